@@ -7,9 +7,10 @@ from langchain.tools import Tool
 from langchain.agents import create_openai_functions_agent
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
 from langchain_core.runnables import RunnableParallel
-from langchain.memory import ConversationBufferMemory
 import requests
 
+from token_memory import TokenBudgetMemory
+
 # --- 1. SETUP LM-STUDIO API WRAPPER ---
 class LMStudioWrapper:
     def __init__(self, endpoint_url: str, api_key: str = None):
@@ -128,7 +129,9 @@ def supervisor_agent(input_query, tools, memory, behavior, features):
     return reviewed_code
 
 # --- 7. SHARED MEMORY ---
-shared_memory = ConversationBufferMemory()
+# Bounded to 2000 tokens: recent turns verbatim, older turns (and long generated
+# programs beyond 400 tokens) folded into a summary written by the local model
+shared_memory = TokenBudgetMemory(llm=lm_studio_model.call_model, max_token_limit=2000)
 
 # --- 8. PARALLEL PROCESSING ---
 parallel_agents = RunnableParallel(
@@ -166,3 +169,4 @@ if __name__ == "__main__":
     final_code = full_workflow(query, tools, memory, behavior, features)
     print("Final Generated Agent Code:\n")
     print(final_code)
+    print("\nShared memory:", shared_memory.stats())
@@ -1,14 +1,20 @@
+import asyncio
+import json
+import os
 import requests
-from langchain.memory import ConversationBufferMemory, ConversationSummaryMemory
+from langchain.memory import ConversationSummaryMemory
 from langchain.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableParallel, RunnableConditional, RunnableLambda
-from langchain.tools import ShellRun
+from langchain_core.runnables import RunnableParallel, RunnableLambda
+from langchain.tools import ShellRun, Tool
 from langchain.agents import create_openai_functions_agent, AgentExecutor
 from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import GitHubRepoLoader
 from langchain_community.chat_models import ChatOpenAI
 from langchain_core.output_parsers import JsonOutputParser
+from github_scheduler import GitHubScheduler
+from pipeline_runner import PipelineRunner
+from repo_index import RepoIndex
+from task_queue import PRIORITY_NORMAL, PRIORITY_URGENT, TaskQueue, WorkerPool
+from token_memory import TokenBudgetMemory
 
 # LM-Studio Local Integration
 class LMStudioAPI:
@@ -21,22 +27,41 @@ class LMStudioAPI:
 
 lm_studio = LMStudioAPI()
 
+# Initialize LLM
+llm = ChatOpenAI(model="gpt-4", temperature=0)
+
 # Initialize Memory
-memory = ConversationBufferMemory(memory_key="chat_history")
+# Recent turns are kept verbatim within 2000 tokens; older turns are summarized in the background
+memory = TokenBudgetMemory(llm=llm, memory_key="chat_history", max_token_limit=2000)
 summary_memory = ConversationSummaryMemory()
 
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-4", temperature=0)
+# GitHub API Scheduler
+# Every GitHub API call from the agents goes through one scheduler that paces
+# requests against the rate limits of each token (GITHUB_TOKENS is comma-separated)
+github_scheduler = GitHubScheduler(os.getenv("GITHUB_TOKENS", os.getenv("GITHUB_TOKEN", "")).split(","))
 
 # Load GitHub Repository and Create Retriever
+# The index is persisted locally; startup only re-embeds files changed since the stored commit
 repo_url = "https://github.com/your-repo"
-loader = GitHubRepoLoader(repo_url)
-documents = loader.load_and_split()
-vectorstore = FAISS.from_documents(documents, OpenAIEmbeddings())
+repo_index = RepoIndex(repo_url, OpenAIEmbeddings(), index_dir="github_index", scheduler=github_scheduler)
+vectorstore = repo_index.sync()
 retriever = vectorstore.as_retriever()
 
 # Tools and Agent Initialization
-tools = [ShellRun()]
+def github_api(request):
+    """Run 'METHOD /path' with an optional JSON body after the path through the scheduler"""
+    method, _, rest = request.strip().partition(" ")
+    path, _, body = rest.strip().partition(" ")
+    response = github_scheduler.request(method.upper(), path, json=json.loads(body) if body.strip() else None)
+    return f"{response.status_code}\n{response.text[:4000]}"
+
+github_tool = Tool(
+    name="github_api",
+    func=github_api,
+    description="Call the GitHub REST API. Input: 'METHOD /path' optionally followed by a JSON body, "
+                "e.g. 'GET /repos/owner/repo/pulls'.",
+)
+tools = [ShellRun(), github_tool]
 agent = create_openai_functions_agent(llm=llm, tools=tools, prompt="Enhanced GitHub Manager")
 executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
 
@@ -66,17 +91,27 @@ Question: {question}
 rag_chain = retriever | prompt_template | llm
 
 # Task Prioritization
-priority_logic = RunnableConditional(
-    condition=lambda x: "urgent" in x["task_metadata"],
-    if_true=lambda x: executor.invoke({"task": x["task_name"]}),
-    if_false=lambda x: print("Task deferred.")
-)
+# Tasks are persisted in a SQLite queue and run by a worker pool; urgent tasks are
+# claimed ahead of deferred ones, identical queued tasks are merged and put() blocks
+# once too many tasks are waiting
+task_queue = TaskQueue("github_tasks.sqlite3", max_pending=1000)
+task_workers = WorkerPool(task_queue, lambda task: executor.invoke({"task": task["task_name"]}), workers=4)
+
+def enqueue_task(x):
+    priority = PRIORITY_URGENT if "urgent" in x["task_metadata"] else PRIORITY_NORMAL
+    return task_queue.put({"task_name": x["task_name"]}, priority=priority, deadline=x.get("deadline"))
+
+priority_logic = RunnableLambda(enqueue_task)
 
 # CI/CD Trigger
-def trigger_pipeline(pipeline_name):
-    shell_tool = ShellRun()
-    command = f"bash {pipeline_name}"
-    return shell_tool.invoke({"command": command})
+# Pipelines run as subprocesses, up to four at once, with their output streamed live
+pipeline_runner = PipelineRunner(max_concurrency=4)
+
+async def trigger_pipeline(pipeline_name, timeout=None):
+    run = pipeline_runner.start(pipeline_name, f"bash {pipeline_name}", timeout=timeout)
+    async for line in run.subscribe():
+        print(f"[{pipeline_name}] {line.text}")
+    return run.summary()
 
 # Safe Execution with Fallbacks
 def safe_execution(task):
@@ -102,9 +137,11 @@ def main():
     print("Starting GitHub Management System...")
 
     # Task Prioritization Example
+    task_workers.start()
     task = {"task_name": "merge PR", "task_metadata": "urgent"}
     print("Task Prioritization:")
-    priority_logic.invoke(task)
+    task_id = priority_logic.invoke(task)
+    print("Queued task", task_id)
 
     # RAG Example
     print("\nRAG Chain Example:")
@@ -115,10 +152,11 @@ def main():
     print("\nMulti-Agent Collaboration:")
     collaboration_result = collaboration_chain.invoke({"repo": "your-repo"})
     print("Collaboration Result:", collaboration_result)
+    print("GitHub API usage:", github_scheduler.stats())
 
     # CI/CD Pipeline Example
     print("\nTrigger CI/CD Pipeline:")
-    pipeline_result = trigger_pipeline("deploy.sh")
+    pipeline_result = asyncio.run(trigger_pipeline("deploy.sh"))
     print("Pipeline Trigger Result:", pipeline_result)
 
     # Safe Execution Example
@@ -126,5 +164,11 @@ def main():
     safe_execution_result = safe_chain.invoke({"task": "invalid task"})
     print("Safe Execution Result:", safe_execution_result)
 
+    # Let the queued tasks finish; anything left over stays queued for the next run
+    task_workers.join()
+    task_workers.stop()
+    print("Task Queue:", task_queue.stats())
+    print("Memory:", memory.stats())
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,181 @@
+import threading
+import time
+
+import requests
+
+
+GITHUB_API = "https://api.github.com"
+
+# Requests in flight per token and endpoint class. GitHub asks for mutating
+# requests to be made serially, and search has a much smaller quota.
+DEFAULT_CONCURRENCY = {"core": 8, "write": 1, "search": 2, "graphql": 4}
+# Minimum seconds between mutating requests of one token
+WRITE_INTERVAL = 1.0
+# Below this fraction of the quota, requests are spread evenly until the reset
+PACING_THRESHOLD = 0.1
+# Wait used for a secondary rate limit that comes without Retry-After
+SECONDARY_LIMIT_BACKOFF = 60
+
+
+def endpoint_class(method, path):
+    """Concurrency class of a request: core reads, writes, search or graphql"""
+    if path.startswith("/search/"):
+        return "search"
+    if path.startswith("/graphql"):
+        return "graphql"
+    if method.upper() not in ("GET", "HEAD"):
+        return "write"
+    return "core"
+
+
+def quota_resource(endpoint):
+    """Rate limit bucket an endpoint class draws from; writes use the core quota"""
+    return "core" if endpoint == "write" else endpoint
+
+
+class Quota:
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset_at = 0.0
+        self.blocked_until = 0.0
+        self.next_at = 0.0
+
+
+class GitHubScheduler:
+    """Queues and paces GitHub API calls from every agent through shared rate limits.
+
+    Quota and reset time are tracked per token and rate-limit resource from the
+    X-RateLimit-* response headers. In-flight requests are capped per token and
+    endpoint class. A 403/429 rate-limit response blocks only its token and
+    resource until Retry-After or the reset time; the call is then retried,
+    on another token if one is available.
+    """
+
+    def __init__(self, tokens, api_url=GITHUB_API, concurrency=None, max_retries=3, timeout=30):
+        self.tokens = [token for token in tokens if token] or [None]
+        self.api_url = api_url.rstrip("/")
+        self.concurrency = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._condition = threading.Condition()
+        self._quotas = {}
+        self._in_flight = {}
+        # Writes are spaced per token without holding back reads, which share the core quota
+        self._write_next_at = {}
+        self.requests = 0
+        self.rate_limited = 0
+        self.waited = 0.0
+
+    def _quota(self, token, resource):
+        return self._quotas.setdefault((token, resource), Quota())
+
+    def _delay(self, token, endpoint, now):
+        """Seconds until token may start another request of this class (0 if it may now)"""
+        quota = self._quota(token, quota_resource(endpoint))
+        delay = max(quota.blocked_until - now, quota.next_at - now, 0.0)
+        if endpoint == "write":
+            delay = max(delay, self._write_next_at.get(token, 0.0) - now)
+        if quota.remaining is not None and quota.remaining <= 0 and quota.reset_at > now:
+            delay = max(delay, quota.reset_at - now)
+        if self._in_flight.get((token, endpoint), 0) >= self.concurrency[endpoint]:
+            # Woken up by _release as soon as a slot frees
+            delay = max(delay, 1.0)
+        return delay
+
+    def _acquire(self, endpoint):
+        resource = quota_resource(endpoint)
+        started = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.time()
+                # Prefer the token with the most quota left
+                ranked = sorted(
+                    self.tokens,
+                    key=lambda token: self._quota(token, resource).remaining or 0,
+                    reverse=True,
+                )
+                delays = {token: self._delay(token, endpoint, now) for token in ranked}
+                token = next((token for token in ranked if delays[token] <= 0), None)
+                if token is not None:
+                    break
+                self._condition.wait(timeout=min(delays.values()))
+            quota = self._quota(token, resource)
+            if quota.remaining is not None:
+                quota.remaining -= 1
+                if quota.limit and quota.remaining < quota.limit * PACING_THRESHOLD and quota.reset_at > now:
+                    # Spread what is left evenly over the time until the reset
+                    quota.next_at = now + (quota.reset_at - now) / max(quota.remaining, 1)
+            if endpoint == "write":
+                self._write_next_at[token] = now + WRITE_INTERVAL
+            self._in_flight[(token, endpoint)] = self._in_flight.get((token, endpoint), 0) + 1
+        self.waited += time.monotonic() - started
+        return token
+
+    def _release(self, token, endpoint, response):
+        with self._condition:
+            self._in_flight[(token, endpoint)] -= 1
+            if response is not None:
+                self._update(token, endpoint, response)
+            self._condition.notify_all()
+
+    def _update(self, token, endpoint, response):
+        headers = response.headers
+        resource = headers.get("X-RateLimit-Resource") or quota_resource(endpoint)
+        quota = self._quota(token, resource)
+        if "X-RateLimit-Remaining" in headers:
+            quota.remaining = int(headers["X-RateLimit-Remaining"])
+            quota.limit = int(headers.get("X-RateLimit-Limit", quota.limit or 0)) or None
+            quota.reset_at = float(headers.get("X-RateLimit-Reset", quota.reset_at))
+        if self.is_rate_limited(response):
+            self.rate_limited += 1
+            now = time.time()
+            if "Retry-After" in headers:
+                quota.blocked_until = now + float(headers["Retry-After"])
+            elif quota.remaining == 0 and quota.reset_at > now:
+                quota.blocked_until = quota.reset_at
+            else:
+                quota.blocked_until = now + SECONDARY_LIMIT_BACKOFF
+
+    @staticmethod
+    def is_rate_limited(response):
+        if response.status_code == 429:
+            return True
+        if response.status_code != 403:
+            return False
+        return (
+            "Retry-After" in response.headers
+            or response.headers.get("X-RateLimit-Remaining") == "0"
+            or "rate limit" in response.text.lower()
+        )
+
+    def request(self, method, path, **kwargs):
+        """Make a GitHub API request once the rate limits allow it"""
+        endpoint = endpoint_class(method, path)
+        url = path if path.startswith("http") else f"{self.api_url}/{path.lstrip('/')}"
+        base_headers = {"Accept": "application/vnd.github+json", **kwargs.pop("headers", {})}
+        for attempt in range(self.max_retries + 1):
+            token = self._acquire(endpoint)
+            headers = dict(base_headers)
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+            response = None
+            try:
+                response = self.session.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+                self.requests += 1
+            finally:
+                self._release(token, endpoint, response)
+            if not self.is_rate_limited(response) or attempt == self.max_retries:
+                return response
+
+    def stats(self):
+        """Request counts, time spent waiting and the last known quota of each token (by index)"""
+        with self._condition:
+            quotas = {
+                f"{self.tokens.index(token)}:{resource}": {
+                    "remaining": quota.remaining, "limit": quota.limit, "reset_at": quota.reset_at,
+                }
+                for (token, resource), quota in self._quotas.items()
+            }
+        return {"requests": self.requests, "rate_limited": self.rate_limited, "waited": self.waited, "quotas": quotas}
@@ -0,0 +1,198 @@
+import asyncio
+import itertools
+import os
+import signal
+import time
+
+
+# A pipeline script starts a new timed step by printing this marker followed by the step name
+STEP_MARKER = "::step::"
+DEFAULT_TIMEOUT = 30 * 60
+# Seconds between SIGTERM and SIGKILL when a pipeline is stopped
+KILL_GRACE = 5
+
+
+class PipelineLine:
+    def __init__(self, stream, text, timestamp):
+        self.stream = stream
+        self.text = text
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return f"[{self.stream}] {self.text}"
+
+
+class PipelineRun:
+    """One execution of a pipeline: its output so far, step timings and final status"""
+
+    def __init__(self, run_id, name, command, timeout):
+        self.id = run_id
+        self.name = name
+        self.command = command
+        self.timeout = timeout
+        self.status = "queued"
+        self.returncode = None
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.lines = []
+        self.steps = []
+        self.task = None
+        self._subscribers = []
+        self._step_started = None
+
+    def _publish(self, line):
+        self.lines.append(line)
+        if line.stream == "stdout" and line.text.startswith(STEP_MARKER):
+            self._end_step(line.timestamp)
+            self.steps.append({"name": line.text[len(STEP_MARKER):].strip(), "duration": None})
+            self._step_started = line.timestamp
+        for queue in self._subscribers:
+            queue.put_nowait(line)
+
+    def _end_step(self, now):
+        if self.steps and self.steps[-1]["duration"] is None:
+            self.steps[-1]["duration"] = now - self._step_started
+
+    def _finish(self, status, returncode=None):
+        self.finished_at = time.time()
+        self._end_step(self.finished_at)
+        self.status = status
+        self.returncode = returncode
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+        self._subscribers = []
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    async def subscribe(self):
+        """Yield every output line, replaying what was printed before subscribing, until the run ends"""
+        queue = asyncio.Queue()
+        history = list(self.lines)
+        if not self.done:
+            self._subscribers.append(queue)
+        for line in history:
+            yield line
+        if self.done:
+            return
+        while True:
+            line = await queue.get()
+            if line is None:
+                return
+            yield line
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "returncode": self.returncode,
+            "queued": (self.started_at or self.finished_at or time.time()) - self.queued_at,
+            "duration": (self.finished_at or time.time()) - self.started_at if self.started_at else None,
+            "steps": self.steps,
+        }
+
+
+class PipelineRunner:
+    """Runs pipeline scripts as subprocesses, at most max_concurrency at a time.
+
+    Output is streamed line by line to subscribers while the pipeline runs.
+    A pipeline is killed when it exceeds its timeout or is cancelled.
+    """
+
+    def __init__(self, max_concurrency=4, default_timeout=DEFAULT_TIMEOUT, cwd=None):
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.cwd = cwd
+        self.runs = {}
+        self._ids = itertools.count(1)
+        self._semaphore = None
+
+    def start(self, name, command=None, timeout=None):
+        """Queue a pipeline and return its PipelineRun immediately; must be called inside the event loop"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        run = PipelineRun(next(self._ids), name, command or f"bash {name}", timeout or self.default_timeout)
+        run.task = asyncio.get_running_loop().create_task(self._execute(run))
+        self.runs[run.id] = run
+        return run
+
+    async def _read(self, run, stream, name):
+        while True:
+            line = await stream.readline()
+            if not line:
+                return
+            run._publish(PipelineLine(name, line.decode("utf-8", errors="replace").rstrip("\r\n"), time.time()))
+
+    async def _execute(self, run):
+        try:
+            async with self._semaphore:
+                run.status = "running"
+                run.started_at = time.time()
+                process = await asyncio.create_subprocess_shell(
+                    run.command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=self.cwd,
+                    start_new_session=True,
+                )
+                # One deadline for the output and the exit: a step may close its pipes and keep running
+                completion = asyncio.gather(
+                    self._read(run, process.stdout, "stdout"),
+                    self._read(run, process.stderr, "stderr"),
+                    process.wait(),
+                )
+                try:
+                    _, _, returncode = await asyncio.wait_for(asyncio.shield(completion), run.timeout)
+                except asyncio.TimeoutError:
+                    await self._kill(process)
+                    await completion
+                    run._finish("timeout", process.returncode)
+                    return run
+                except asyncio.CancelledError:
+                    await self._kill(process)
+                    completion.cancel()
+                    run._finish("cancelled", process.returncode)
+                    raise
+                run._finish("succeeded" if returncode == 0 else "failed", returncode)
+        except asyncio.CancelledError:
+            if not run.done:
+                run._finish("cancelled")
+            raise
+        except Exception as e:
+            run._publish(PipelineLine("stderr", f"Could not run pipeline: {e}", time.time()))
+            run._finish("error")
+        return run
+
+    @staticmethod
+    async def _kill(process):
+        """Stop the whole process group: SIGTERM, then SIGKILL after KILL_GRACE seconds"""
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(process.wait(), KILL_GRACE)
+            except asyncio.TimeoutError:
+                os.killpg(process.pid, signal.SIGKILL)
+                await process.wait()
+        except ProcessLookupError:
+            pass
+
+    def cancel(self, run_id):
+        run = self.runs[run_id]
+        if not run.done:
+            run.task.cancel()
+
+    async def wait(self, run_id):
+        """Wait for the run to finish; cancelling the waiter leaves the run itself running"""
+        run = self.runs[run_id]
+        try:
+            await asyncio.shield(run.task)
+        except asyncio.CancelledError:
+            # A run cancelled through cancel() is a normal end; the waiter's own cancellation is not
+            if not run.task.cancelled():
+                raise
+        return run
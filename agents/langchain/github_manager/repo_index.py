@@ -0,0 +1,174 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlparse
+
+import requests
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+
+GITHUB_API = "https://api.github.com"
+# The compare API lists at most 300 files; a bigger diff is rebuilt from scratch
+COMPARE_FILE_LIMIT = 300
+MAX_FILE_BYTES = 512 * 1024
+
+
+class RepoIndex:
+    """FAISS index of a GitHub repository, persisted with the commit SHA it was built from.
+
+    sync() loads the saved index and only fetches and re-embeds the files
+    that changed between the saved SHA and the branch head.
+    """
+
+    def __init__(self, repo_url, embeddings, index_dir="github_index", branch=None, token=None,
+                 api_url=GITHUB_API, workers=8, scheduler=None):
+        self.repo = urlparse(repo_url).path.strip("/")
+        if self.repo.endswith(".git"):
+            self.repo = self.repo[:-len(".git")]
+        self.embeddings = embeddings
+        self.index_dir = index_dir
+        self.branch = branch
+        self.api_url = api_url.rstrip("/")
+        self.workers = workers
+        # A GitHubScheduler shares rate limits with the agents; it replaces token and api_url
+        self.scheduler = scheduler
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self.state_path = os.path.join(index_dir, "state.json")
+
+    # GitHub API
+    def _request(self, path="", **kwargs):
+        path = f"/repos/{self.repo}" + (f"/{path}" if path else "")
+        if self.scheduler is not None:
+            return self.scheduler.request("GET", path, **kwargs)
+        return self.session.get(self.api_url + path, timeout=30, **kwargs)
+
+    def _get(self, path="", **kwargs):
+        response = self._request(path, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def head_sha(self):
+        branch = self.branch or self._get().json()["default_branch"]
+        return self._get(f"commits/{quote(branch, safe='')}").json()["sha"]
+
+    def list_files(self, sha):
+        tree = self._get(f"git/trees/{sha}", params={"recursive": "1"}).json()
+        return [
+            item["path"] for item in tree["tree"]
+            if item["type"] == "blob" and item.get("size", 0) <= MAX_FILE_BYTES
+        ]
+
+    def changed_files(self, base, head):
+        """(changed or added paths, removed paths) between two commits, or None if too many to list"""
+        response = self._request(f"compare/{base}...{head}")
+        if response.status_code == 404:
+            # The stored commit no longer exists, e.g. after a force push
+            return None
+        response.raise_for_status()
+        files = response.json().get("files", [])
+        if len(files) >= COMPARE_FILE_LIMIT:
+            return None
+        changed, removed = [], []
+        for file in files:
+            if file["status"] == "removed":
+                removed.append(file["filename"])
+                continue
+            if file["status"] == "renamed":
+                removed.append(file["previous_filename"])
+            changed.append(file["filename"])
+        return changed, removed
+
+    def fetch_file(self, path, sha):
+        response = self._get(
+            f"contents/{quote(path)}", params={"ref": sha}, headers={"Accept": "application/vnd.github.raw"}
+        )
+        data = response.content
+        if len(data) > MAX_FILE_BYTES or b"\0" in data[:8000]:
+            return None
+        return data.decode("utf-8", errors="replace")
+
+    def fetch_documents(self, paths, sha):
+        """Split the given files at sha into chunks, fetching them in parallel; returns {path: [Document]}"""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            texts = list(executor.map(lambda path: self.fetch_file(path, sha), paths))
+        documents = {}
+        for path, text in zip(paths, texts):
+            if text:
+                chunks = self.splitter.split_documents([Document(page_content=text, metadata={"source": path})])
+                if chunks:
+                    documents[path] = chunks
+        return documents
+
+    # Persistence
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path, "r") as file:
+            return json.load(file)
+
+    def save(self, vectorstore, sha, files):
+        vectorstore.save_local(self.index_dir)
+        state = {"repo": self.repo, "sha": sha, "files": files}
+        with open(self.state_path + ".tmp", "w") as file:
+            json.dump(state, file)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+    @staticmethod
+    def chunk_ids(path, chunks):
+        return [f"{path}#{i}" for i in range(len(chunks))]
+
+    # Sync
+    def build(self, sha):
+        """Fetch and embed the whole repository at sha"""
+        documents = self.fetch_documents(self.list_files(sha), sha)
+        files = {path: self.chunk_ids(path, chunks) for path, chunks in documents.items()}
+        texts = [chunk for chunks in documents.values() for chunk in chunks]
+        ids = [chunk_id for chunk_ids in files.values() for chunk_id in chunk_ids]
+        vectorstore = FAISS.from_documents(texts, self.embeddings, ids=ids)
+        self.save(vectorstore, sha, files)
+        print(f"Indexed {len(files)} files ({len(texts)} chunks) at {sha[:7]}")
+        return vectorstore
+
+    def sync(self):
+        """Return an index that is current with the branch head"""
+        state = self.load_state()
+        if state is not None and state.get("repo") != self.repo:
+            state = None
+        try:
+            head = self.head_sha()
+        except requests.RequestException as e:
+            if state is None:
+                raise
+            print(f"Could not reach GitHub ({e}), using the index from {state['sha'][:7]}")
+            head = state["sha"]
+        if state is None:
+            return self.build(head)
+
+        vectorstore = FAISS.load_local(self.index_dir, self.embeddings, allow_dangerous_deserialization=True)
+        if state["sha"] == head:
+            return vectorstore
+
+        diff = self.changed_files(state["sha"], head)
+        if diff is None:
+            return self.build(head)
+        changed, removed = diff
+
+        files = state["files"]
+        stale = [chunk_id for path in changed + removed for chunk_id in files.pop(path, [])]
+        if stale:
+            vectorstore.delete(stale)
+        documents = self.fetch_documents(changed, head)
+        for path, chunks in documents.items():
+            ids = self.chunk_ids(path, chunks)
+            vectorstore.add_documents(chunks, ids=ids)
+            files[path] = ids
+
+        self.save(vectorstore, head, files)
+        print(f"Synced {state['sha'][:7]}..{head[:7]}: {len(documents)} files re-embedded, {len(removed)} removed")
+        return vectorstore
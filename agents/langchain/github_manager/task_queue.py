@@ -0,0 +1,207 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import traceback
+
+
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 50
+PRIORITY_BULK = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    deadline REAL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+-- A task is deduplicated while an identical one is waiting or running
+CREATE UNIQUE INDEX IF NOT EXISTS tasks_active_key ON tasks (key) WHERE status IN ('pending', 'running');
+CREATE INDEX IF NOT EXISTS tasks_order ON tasks (status, priority, deadline, id);
+"""
+
+
+class QueueFull(Exception):
+    pass
+
+
+def task_key(task):
+    return hashlib.sha256(json.dumps(task, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class TaskQueue:
+    """Persistent priority queue of agent tasks in SQLite.
+
+    Tasks are claimed lowest priority value first, then earliest deadline, then
+    in arrival order. Identical tasks are stored once while pending or running,
+    tasks whose deadline passed before they started are expired instead of run,
+    and put() blocks (or raises QueueFull) once max_pending tasks are waiting.
+    """
+
+    def __init__(self, path="github_tasks.sqlite3", max_pending=1000):
+        self.max_pending = max_pending
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        with self._lock:
+            # Tasks that were running when the process stopped are run again
+            self._connection.execute("UPDATE tasks SET status = 'pending', started_at = NULL WHERE status = 'running'")
+
+    def _active(self, key):
+        return self._connection.execute(
+            "SELECT id, priority FROM tasks WHERE key = ? AND status IN ('pending', 'running')", (key,)
+        ).fetchone()
+
+    def _pending(self):
+        return self._connection.execute("SELECT COUNT(*) FROM tasks WHERE status = 'pending'").fetchone()[0]
+
+    def put(self, task, priority=PRIORITY_NORMAL, deadline=None, key=None, block=True, timeout=None):
+        """Queue task (a JSON-serializable dict); returns its id, or the id of the identical queued task.
+
+        deadline is a Unix timestamp after which the task is no longer worth starting.
+        """
+        key = key or task_key(task)
+        with self._lock:
+            # Duplicates never wait for backpressure; the check is repeated after waiting
+            # because an identical task may have been queued in the meantime
+            ready = self._changed.wait_for(
+                lambda: self._active(key) or self._pending() < self.max_pending, timeout if block else 0
+            )
+            existing = self._active(key)
+            if existing:
+                if priority < existing[1]:
+                    # A more urgent request for the same task moves it up
+                    self._connection.execute("UPDATE tasks SET priority = ? WHERE id = ? AND status = 'pending'",
+                                             (priority, existing[0]))
+                return existing[0]
+            if not ready:
+                raise QueueFull(f"{self.max_pending} tasks are already pending")
+            cursor = self._connection.execute(
+                "INSERT INTO tasks (key, priority, deadline, payload, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+                (key, priority, deadline, json.dumps(task, default=str), time.time()),
+            )
+            self._changed.notify_all()
+            return cursor.lastrowid
+
+    def claim(self, timeout=None):
+        """Take the most urgent pending task as (id, task), waiting up to timeout; None if there is none"""
+        with self._lock:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                now = time.time()
+                self._connection.execute(
+                    "UPDATE tasks SET status = 'expired', finished_at = ? "
+                    "WHERE status = 'pending' AND deadline IS NOT NULL AND deadline < ?", (now, now),
+                )
+                row = self._connection.execute(
+                    "SELECT id, payload FROM tasks WHERE status = 'pending' "
+                    "ORDER BY priority, deadline IS NULL, deadline, id LIMIT 1"
+                ).fetchone()
+                if row:
+                    self._connection.execute(
+                        "UPDATE tasks SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        (now, row[0]),
+                    )
+                    # Frees a slot for a producer blocked on backpressure
+                    self._changed.notify_all()
+                    return row[0], json.loads(row[1])
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+
+    def complete(self, task_id, result=None):
+        with self._lock:
+            self._connection.execute(
+                "UPDATE tasks SET status = 'done', finished_at = ?, result = ? WHERE id = ?",
+                (time.time(), json.dumps(result, default=str), task_id),
+            )
+
+    def fail(self, task_id, error, max_attempts=1):
+        """Record a failure; the task is queued again until it has been tried max_attempts times"""
+        with self._lock:
+            attempts = self._connection.execute("SELECT attempts FROM tasks WHERE id = ?", (task_id,)).fetchone()[0]
+            status = "pending" if attempts < max_attempts else "failed"
+            self._connection.execute(
+                "UPDATE tasks SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                (status, time.time(), error, task_id),
+            )
+            self._changed.notify_all()
+
+    def get(self, task_id):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status, result, error FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "result": json.loads(row[1]) if row[1] else None, "error": row[2]}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class WorkerPool:
+    """Threads that drain a TaskQueue by calling handler(task) for each claimed task"""
+
+    def __init__(self, queue, handler, workers=4, max_attempts=1):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def _work(self):
+        while not self._stopping.is_set():
+            claimed = self.queue.claim(timeout=1.0)
+            if claimed is None:
+                continue
+            task_id, task = claimed
+            try:
+                result = self.handler(task)
+            except Exception as e:
+                print(f"Task {task_id} failed: {e}")
+                self.queue.fail(task_id, traceback.format_exc(), self.max_attempts)
+            else:
+                self.queue.complete(task_id, result)
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"task-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, wait=True):
+        """Stop after the tasks in progress; pending tasks stay queued for the next start"""
+        self._stopping.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def join(self, poll_interval=0.2):
+        """Block until no tasks are pending or running"""
+        while True:
+            stats = self.queue.stats()
+            if not stats.get("pending") and not stats.get("running"):
+                return
+            time.sleep(poll_interval)
@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+import time
+from pipeline_runner import PipelineRunner
+
+@pytest.mark.asyncio
+async def test_pipeline_succeeds():
+    runner = PipelineRunner()
+    run = runner.start("build", "echo built")
+    await runner.wait(run.id)
+
+    assert run.status == "succeeded"
+    assert [line.text for line in run.lines] == ["built"]
+
+@pytest.mark.asyncio
+async def test_timeout_after_closing_output():
+    # The step closes stdout/stderr but keeps running: the timeout must still apply
+    runner = PipelineRunner()
+    started = time.monotonic()
+    run = runner.start("detached", "exec >/dev/null 2>&1; sleep 3", timeout=0.5)
+    await runner.wait(run.id)
+
+    assert run.status == "timeout"
+    assert time.monotonic() - started < 2
+
+@pytest.mark.asyncio
+async def test_cancelling_a_waiter_leaves_the_run():
+    runner = PipelineRunner()
+    run = runner.start("slow", "sleep 0.5; echo done")
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(runner.wait(run.id), 0.1)
+    await runner.wait(run.id)
+
+    assert run.status == "succeeded"
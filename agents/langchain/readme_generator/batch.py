@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from langchain_community.chat_models import ChatOpenAI
+from langchain_core.runnables import RunnableLambda
+
+from github_client import GitHubClient, DEFAULT_API_URL, DEFAULT_CACHE_DIR
+from readme_agent import (
+    analyze_repo,
+    create_readme,
+    create_pull_request,
+    fetch_repo_details,
+    parse_node_dependencies,
+    parse_python_dependencies,
+)
+from summary_cache import SummaryCache
+
+
+def read_manifest(path):
+    """Repositories to process, one JSON object per line or a JSON list.
+
+    Each entry needs "repo" (local path) and may set "repo_name" (owner/repo on
+    GitHub), "name", "template" and "branch_name".
+    """
+    with open(path, "r") as file:
+        text = file.read().strip()
+    if text.startswith("["):
+        entries = json.loads(text)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    for entry in entries:
+        if "repo" not in entry:
+            raise ValueError(f"Manifest entry without a 'repo' path: {entry}")
+    return entries
+
+
+def limit_concurrency(llm, max_concurrency):
+    """Wrap llm so that all repositories together make at most max_concurrency calls at once"""
+    semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    def call(prompt):
+        with semaphore:
+            return llm.invoke(prompt)
+
+    return RunnableLambda(call)
+
+
+def timed_analysis(repo_path):
+    if not os.path.isdir(repo_path):
+        raise FileNotFoundError(f"Repository path not found: {repo_path}")
+    started = time.perf_counter()
+    documents = analyze_repo(repo_path, extra_ignores=["/README.md"])
+    return documents, time.perf_counter() - started
+
+
+def generate(entry, documents, llm, args, github):
+    """Write README.md for one analyzed repository and optionally open a pull request"""
+    repo_path = entry["repo"]
+    details = None
+    if github and entry.get("repo_name"):
+        details = fetch_repo_details(github, entry["repo_name"], use_graphql=args.graphql)
+    name = entry.get("name") or (details or {}).get("name") or os.path.basename(os.path.abspath(repo_path))
+
+    cache = SummaryCache() if args.no_cache else SummaryCache.for_repo(repo_path)
+    try:
+        readme_content = create_readme(
+            repo_path, name, entry.get("template", args.template), cache=cache,
+            max_concurrency=args.concurrency, llm=llm, documents=documents,
+        )
+        cache_stats = {"hits": cache.hits, "misses": cache.misses, "pruned": cache.prune()}
+    finally:
+        cache.close()
+    readme_content += (
+        f"\n\n## Dependencies\n### Python\n{parse_python_dependencies(repo_path)}"
+        f"\n### Node.js\n{parse_node_dependencies(repo_path)}"
+    )
+    readme_path = os.path.join(repo_path, "README.md")
+    with open(readme_path, "w") as file:
+        file.write(readme_content)
+
+    result = {"readme": readme_path, "cache": cache_stats}
+    if args.create_pr and details:
+        result["pull_request"] = create_pull_request(
+            github, entry["repo_name"], entry.get("branch_name", args.branch_name), readme_path,
+            "Update README", base=details["default_branch"],
+        )
+    return result
+
+
+def run_batch(entries, args, report_path):
+    """Analyze repositories in a process pool and generate READMEs in threads under one LLM limit.
+
+    Each repository moves on to generation as soon as its own analysis finishes
+    and its result is appended to the report as soon as it is done, so a slow or
+    failing repository never holds up the others.
+    """
+    llm = limit_concurrency(ChatOpenAI(model="gpt-3.5-turbo"), args.concurrency)
+    github = None
+    if args.github_token:
+        github = GitHubClient(args.github_token, api_url=args.api_url, cache_dir=args.github_cache_dir)
+
+    started = {}
+    results = []
+    with ProcessPoolExecutor(max_workers=args.analysis_workers) as analysis_pool, \
+            ThreadPoolExecutor(max_workers=args.parallel_repos) as generation_pool, \
+            open(report_path, "a") as report:
+
+        def record(entry, status, **fields):
+            result = {"repo": entry["repo"], "status": status, **fields}
+            result.setdefault("timings", {})["total"] = time.perf_counter() - started[entry["repo"]]
+            report.write(json.dumps(result) + "\n")
+            report.flush()
+            results.append(result)
+            print(f"[{status}] {entry['repo']} in {result['timings']['total']:.1f}s")
+
+        def generate_timed(entry, documents):
+            generation_started = time.perf_counter()
+            result = generate(entry, documents, llm, args, github)
+            return result, time.perf_counter() - generation_started
+
+        analyses = {}
+        for entry in entries:
+            started[entry["repo"]] = time.perf_counter()
+            analyses[analysis_pool.submit(timed_analysis, entry["repo"])] = entry
+
+        generations = {}
+        analysis_seconds = {}
+        pending = set(analyses)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in analyses:
+                    entry = analyses[future]
+                    try:
+                        documents, seconds = future.result()
+                    except Exception as e:
+                        record(entry, "error", stage="analyze", error=str(e), traceback=traceback.format_exc())
+                        continue
+                    analysis_seconds[entry["repo"]] = seconds
+                    generation = generation_pool.submit(generate_timed, entry, documents)
+                    generations[generation] = entry
+                    pending.add(generation)
+                    continue
+
+                entry = generations[future]
+                timings = {"analyze": analysis_seconds[entry["repo"]]}
+                try:
+                    result, seconds = future.result()
+                except Exception as e:
+                    record(entry, "error", stage="generate", error=str(e), traceback=traceback.format_exc(),
+                           timings=timings)
+                    continue
+                timings["generate"] = seconds
+                record(entry, "ok", timings=timings, **result)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate READMEs for many repositories")
+    parser.add_argument("--manifest", required=True, help="JSONL or JSON list of repositories.")
+    parser.add_argument("--report", default="readme_report.jsonl", help="JSONL file for per-repo results.")
+    parser.add_argument("--template", default="detailed", help="Default template type.")
+    parser.add_argument("--concurrency", type=int, default=16, help="LLM calls in flight across all repositories.")
+    parser.add_argument("--analysis-workers", type=int, default=os.cpu_count(), help="Processes for repository analysis.")
+    parser.add_argument("--parallel-repos", type=int, default=8, help="Repositories generating at the same time.")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached summaries and regenerate everything.")
+    parser.add_argument("--github-token", default=None, help="GitHub API token, needed for --create-pr.")
+    parser.add_argument("--api-url", default=DEFAULT_API_URL, help="GitHub API base URL.")
+    parser.add_argument("--github-cache-dir", default=DEFAULT_CACHE_DIR, help="Directory for cached GitHub responses.")
+    parser.add_argument("--graphql", action="store_true", help="Fetch repository metadata in one GraphQL query.")
+    parser.add_argument("--create-pr", action="store_true", help="Open a pull request for every generated README.")
+    parser.add_argument("--branch-name", default="readme-update", help="Default branch name for pull requests.")
+    args = parser.parse_args()
+    if args.create_pr and not args.github_token:
+        parser.error("--create-pr requires --github-token")
+
+    results = run_batch(read_manifest(args.manifest), args, args.report)
+    failed = sum(result["status"] != "ok" for result in results)
+    print(f"{len(results) - failed} succeeded, {failed} failed, report written to {args.report}")
@@ -0,0 +1,205 @@
+import base64
+import hashlib
+import json
+import os
+
+import requests
+
+
+DEFAULT_API_URL = "https://api.github.com"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "readme_generator", "github")
+
+REPO_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    name
+    description
+    url
+    defaultBranchRef { name }
+    stargazerCount
+    forkCount
+    issues(states: OPEN) { totalCount }
+    languages(first: 100, orderBy: {field: SIZE, direction: DESC}) {
+      edges { size node { name } }
+    }
+  }
+}
+"""
+
+
+def graphql_url(api_url):
+    """GraphQL endpoint for a REST API base URL, including GitHub Enterprise's /api/v3"""
+    api_url = api_url.rstrip("/")
+    if api_url.endswith("/api/v3"):
+        return api_url[:-len("/v3")] + "/graphql"
+    return api_url + "/graphql"
+
+
+class GitHubClient:
+    """Shared GitHub API session with an on-disk ETag cache for GET requests.
+
+    Cached responses are revalidated with If-None-Match / If-Modified-Since, so
+    unchanged resources come back as 304 Not Modified, which GitHub does not
+    count against the rate limit.
+    """
+
+    def __init__(self, token, api_url=DEFAULT_API_URL, cache_dir=DEFAULT_CACHE_DIR, timeout=30):
+        self.api_url = api_url.rstrip("/")
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {token}",
+        })
+        # Responses differ per token, so cache entries are scoped to it
+        self._token_scope = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+        self.requests = 0
+        self.not_modified = 0
+        self.rate_limit_remaining = None
+
+    def _cache_path(self, url):
+        key = hashlib.sha256(f"{self._token_scope}:{url}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_cache(self, url):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(url), "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, url, response):
+        if not self.cache_dir:
+            return
+        entry = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "body": response.json(),
+        }
+        if not entry["etag"] and not entry["last_modified"]:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(url)
+        with open(path + ".tmp", "w") as file:
+            json.dump(entry, file)
+        os.replace(path + ".tmp", path)
+
+    def _send(self, method, url, **kwargs):
+        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        self.requests += 1
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None:
+            self.rate_limit_remaining = int(remaining)
+        return response
+
+    def url(self, path):
+        return path if path.startswith("http") else f"{self.api_url}/{path.lstrip('/')}"
+
+    def get(self, path, params=None):
+        url = self.url(path)
+        if params:
+            url = requests.Request("GET", url, params=params).prepare().url
+        cached = self._read_cache(url)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        response = self._send("GET", url, headers=headers)
+        if response.status_code == 304 and cached:
+            self.not_modified += 1
+            return cached["body"]
+        response.raise_for_status()
+        self._write_cache(url, response)
+        return response.json()
+
+    def get_optional(self, path, params=None):
+        """Like get(), but returns None for a 404"""
+        try:
+            return self.get(path, params)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+
+    def post(self, path, payload):
+        response = self._send("POST", self.url(path), json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    def put(self, path, payload):
+        response = self._send("PUT", self.url(path), json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    def graphql(self, query, variables):
+        response = self._send("POST", graphql_url(self.api_url), json={"query": query, "variables": variables})
+        response.raise_for_status()
+        result = response.json()
+        if result.get("errors"):
+            raise RuntimeError(f"GraphQL error: {result['errors'][0].get('message')}")
+        return result["data"]
+
+    # Repository helpers
+    def repo_details(self, repo_name):
+        """Repository metadata from the REST API: two conditional GETs"""
+        repo = self.get(f"repos/{repo_name}")
+        return {
+            "name": repo["name"],
+            "description": repo.get("description") or "No description provided.",
+            "url": repo["html_url"],
+            "default_branch": repo.get("default_branch", "main"),
+            "languages": self.get(f"repos/{repo_name}/languages"),
+            "open_issues": repo["open_issues_count"],
+            "stars": repo["stargazers_count"],
+            "forks": repo["forks_count"],
+        }
+
+    def repo_details_graphql(self, repo_name):
+        """Repository metadata in a single GraphQL query"""
+        owner, name = repo_name.split("/", 1)
+        repo = self.graphql(REPO_QUERY, {"owner": owner, "name": name})["repository"]
+        return {
+            "name": repo["name"],
+            "description": repo.get("description") or "No description provided.",
+            "url": repo["url"],
+            "default_branch": (repo.get("defaultBranchRef") or {}).get("name", "main"),
+            "languages": {edge["node"]["name"]: edge["size"] for edge in repo["languages"]["edges"]},
+            # GraphQL counts issues only; the REST count also includes pull requests
+            "open_issues": repo["issues"]["totalCount"],
+            "stars": repo["stargazerCount"],
+            "forks": repo["forkCount"],
+        }
+
+    def create_readme_pull_request(self, repo_name, branch_name, content, commit_message, base=None):
+        """Push README.md to a new branch and open a pull request for it"""
+        if base is None:
+            base = self.get(f"repos/{repo_name}").get("default_branch", "main")
+        base_ref = self.get(f"repos/{repo_name}/git/ref/heads/{base}")
+        self.post(f"repos/{repo_name}/git/refs", {
+            "ref": f"refs/heads/{branch_name}",
+            "sha": base_ref["object"]["sha"],
+        })
+
+        payload = {
+            "message": commit_message,
+            "content": base64.b64encode(content.encode("utf-8")).decode("ascii"),
+            "branch": branch_name,
+        }
+        # Updating an existing README needs the sha of the file being replaced
+        existing = self.get_optional(f"repos/{repo_name}/contents/README.md", params={"ref": base})
+        if existing:
+            payload["sha"] = existing["sha"]
+        self.put(f"repos/{repo_name}/contents/README.md", payload)
+
+        pr = self.post(f"repos/{repo_name}/pulls", {
+            "title": "Add or Update README.md",
+            "body": "This pull request updates the README file with detailed content.",
+            "head": branch_name,
+            "base": base,
+        })
+        return pr["html_url"]
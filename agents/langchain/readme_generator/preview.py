@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import markdown2
+
+
+PAGE_TEMPLATE = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+</head>
+<body>
+{body}
+<script>
+new EventSource("/events").onmessage = function () {{ location.reload(); }};
+</script>
+</body>
+</html>
+"""
+
+POLL_INTERVAL = 0.5
+HEARTBEAT_INTERVAL = 15
+
+
+class MarkdownCache:
+    """A Markdown file and its rendered HTML, re-rendered only when the content hash changes"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.content = ""
+        self.etag = None
+        self.html = b""
+        self.html_gzip = b""
+        self.version = 0
+        self._stat = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def refresh(self):
+        """Re-read the file if its size or mtime changed; returns True if the content changed"""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if signature == self._stat:
+                return False
+            self._stat = signature
+            with open(self.file_path, "r") as file:
+                content = file.read()
+            etag = '"' + hashlib.sha256(content.encode("utf-8")).hexdigest()[:32] + '"'
+            if etag == self.etag:
+                # Touched or rewritten with identical content
+                return False
+            self.content = content
+            self.etag = etag
+            page = PAGE_TEMPLATE.format(title=os.path.basename(self.file_path), body=markdown2.markdown(content))
+            self.html = page.encode("utf-8")
+            self.html_gzip = gzip.compress(self.html)
+            self.version += 1
+            self._changed.notify_all()
+            return True
+
+    def snapshot(self):
+        """Consistent (etag, html, gzipped html) of the latest render"""
+        with self._lock:
+            return self.etag, self.html, self.html_gzip
+
+    def wait_for_change(self, version, timeout):
+        """Block until the rendered version differs from version or timeout expires"""
+        with self._lock:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def watch(self, interval=POLL_INTERVAL):
+        """Poll the file in a daemon thread so changes render without a request"""
+        def poll():
+            while True:
+                self.refresh()
+                time.sleep(interval)
+
+        thread = threading.Thread(target=poll, daemon=True)
+        thread.start()
+        return thread
+
+
+def make_handler(cache):
+    class MarkdownPreviewHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path == "/events":
+                return self.stream_events()
+            etag, html, html_gzip = cache.snapshot()
+            if etag and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+            body = html_gzip if use_gzip else html
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            if use_gzip:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def stream_events(self):
+            """Server-sent events: one message per re-render, which makes the page reload"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            version = cache.version
+            try:
+                while True:
+                    latest = cache.wait_for_change(version, HEARTBEAT_INTERVAL)
+                    if latest != version:
+                        version = latest
+                        self.wfile.write(b"data: reload\n\n")
+                    else:
+                        # Comment line keeps the connection alive and detects closed tabs
+                        self.wfile.write(b": ping\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.close_connection = True
+
+        def log_message(self, format, *args):
+            pass
+
+    return MarkdownPreviewHandler
+
+
+def serve_preview(file_path, port=8000):
+    cache = MarkdownCache(file_path)
+    cache.refresh()
+    cache.watch()
+    httpd = ThreadingHTTPServer(("", port), make_handler(cache))
+    httpd.daemon_threads = True
+    return httpd
@@ -1,63 +1,31 @@
 import os
 import json
-from github import Github
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import DirectoryLoader
 from langchain_community.chat_models import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 from flask import Flask, request, render_template_string
 from rich.console import Console
 from rich.markdown import Markdown
-import markdown2
-from http.server import SimpleHTTPRequestHandler
-import socketserver
 import argparse
+from repo_walker import load_documents, MAX_FILE_BYTES, MAX_TOTAL_BYTES
+from summary_cache import SummaryCache, content_key
+from github_client import GitHubClient, DEFAULT_API_URL, DEFAULT_CACHE_DIR
+from preview import MarkdownCache, serve_preview
+from structure import extract_structure, render_tree
 
 
 # GitHub API Integration
-def fetch_repo_details(github_token, repo_name):
-    g = Github(github_token)
-    repo = g.get_repo(repo_name)
-    details = {
-        "name": repo.name,
-        "description": repo.description or "No description provided.",
-        "url": repo.html_url,
-        "languages": repo.get_languages(),
-        "open_issues": repo.open_issues_count,
-        "stars": repo.stargazers_count,
-        "forks": repo.forks_count,
-    }
-    return details
+def fetch_repo_details(client, repo_name, use_graphql=False):
+    if use_graphql:
+        return client.repo_details_graphql(repo_name)
+    return client.repo_details(repo_name)
 
 
-def create_pull_request(github_token, repo_name, branch_name, file_path, commit_message):
-    g = Github(github_token)
-    repo = g.get_repo(repo_name)
+def create_pull_request(client, repo_name, branch_name, file_path, commit_message, base=None):
     with open(file_path, "r") as file:
         content = file.read()
-
-    # Create a branch
-    ref = repo.get_git_ref("heads/main")
-    repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=ref.object.sha)
-
-    # Push changes
-    repo.create_file(
-        path="README.md",
-        message=commit_message,
-        content=content,
-        branch=branch_name,
-    )
-
-    # Create PR
-    pr = repo.create_pull(
-        title="Add or Update README.md",
-        body="This pull request updates the README file with detailed content.",
-        head=branch_name,
-        base="main",
-    )
-    return pr.html_url
+    return client.create_readme_pull_request(repo_name, branch_name, content, commit_message, base)
 
 
 # Automatic Dependency Parsing
@@ -89,17 +57,8 @@ def preview_markdown(file_path):
 
 
 def live_preview(file_path, port=8000):
-    with open(file_path, "r") as file:
-        html_content = markdown2.markdown(file.read())
-
-    class MarkdownPreviewHandler(SimpleHTTPRequestHandler):
-        def do_GET(self):
-            self.send_response(200)
-            self.send_header("Content-type", "text/html")
-            self.end_headers()
-            self.wfile.write(html_content.encode())
-
-    with socketserver.TCPServer(("", port), MarkdownPreviewHandler) as httpd:
+    # Re-renders when the file's content changes and reloads open browsers
+    with serve_preview(file_path, port) as httpd:
         print(f"Preview available at http://localhost:{port}")
         httpd.serve_forever()
 
@@ -113,6 +72,7 @@ def add_custom_sections(base_content, custom_sections):
 
 # Interactive Web-Based Editor
 app = Flask(__name__)
+readme_file = MarkdownCache("README.md")
 
 @app.route("/", methods=["GET", "POST"])
 def editor():
@@ -121,8 +81,9 @@ def editor():
         with open("README.md", "w") as file:
             file.write(content)
         return "README.md saved successfully!"
-    with open("README.md", "r") as file:
-        current_content = file.read()
+    # Only re-reads the file when its mtime or size changed
+    readme_file.refresh()
+    current_content = readme_file.content
     return render_template_string("""
         <!doctype html>
         <title>Edit README</title>
@@ -134,13 +95,231 @@ def editor():
 
 
 # LangChain README Generation
-def analyze_repo(repo_path):
+def analyze_repo(repo_path, max_file_bytes=MAX_FILE_BYTES, max_total_bytes=MAX_TOTAL_BYTES, workers=8, extra_ignores=None):
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    loader = DirectoryLoader(repo_path, glob="**/*")
-    documents = loader.load_and_split(text_splitter)
+    documents = []
+    # Files stream in from the walker and are split as they arrive
+    for document in load_documents(repo_path, max_file_bytes, max_total_bytes, workers, extra_ignores):
+        documents.extend(text_splitter.split_documents([document]))
     return documents
 
 
+# Map-Reduce Summaries
+MAX_CONCURRENCY = 8
+REDUCE_FANOUT = 20
+SECTION_FILES = 40
+
+CHUNK_SUMMARY_PROMPT = PromptTemplate.from_template("""
+Summarize what this part of the file `{path}` does in two or three sentences.
+
+{content}
+""")
+
+FILE_SUMMARY_PROMPT = PromptTemplate.from_template("""
+Summarize what the file `{path}` does in two or three sentences, based on these summaries of its parts:
+
+{summaries}
+""")
+
+DIRECTORY_SUMMARY_PROMPT = PromptTemplate.from_template("""
+Summarize the purpose of the directory `{path}` in two or three sentences, based on these summaries of its contents:
+
+{summaries}
+""")
+
+REPO_SUMMARY_PROMPT = PromptTemplate.from_template("""
+Write a concise description of the project {project_name} for its README, based on these summaries of its top-level contents:
+
+{summaries}
+""")
+
+SECTION_PROMPT = PromptTemplate.from_template("""
+Write the {section} section of the README for the project {project_name}.
+Return only the section body in Markdown, without a heading.
+
+Project description:
+{description}
+
+Summaries of relevant files:
+{summaries}
+""")
+
+SECTION_HINTS = {
+    "installation": ("requirements", "setup.py", "setup.cfg", "pyproject.toml", "package.json", "dockerfile",
+                     "makefile", "install", "environment.yml", "go.mod", "cargo.toml"),
+    "usage": ("main", "cli", "app", "server", "example", "__main__", "run", "index", "usage"),
+}
+
+
+def cached_batch(chain, cache, kind, items, max_concurrency):
+    """Run chain over (key, inputs) items, sending only cache misses to the LLM, concurrently"""
+    results = {}
+    missing = {}
+    for key, inputs in items:
+        summary = cache.get(key)
+        if summary is None:
+            missing[key] = inputs
+        else:
+            results[key] = summary
+    if missing:
+        outputs = chain.batch(list(missing.values()), config={"max_concurrency": max_concurrency})
+        for key, output in zip(missing, outputs):
+            cache.put(key, kind, output)
+            results[key] = output
+    return [results[key] for key, _ in items]
+
+
+def bullet_list(entries):
+    return "\n".join(f"- {path}: {summary}" for path, summary in entries)
+
+
+def collapse_groups(chain, cache, kind, groups, max_concurrency):
+    """Shrink groups of (path, summary) entries until none is larger than REDUCE_FANOUT.
+
+    Oversized groups are summarized in slices of REDUCE_FANOUT entries, level by
+    level, so no single prompt outgrows the model context. All slices of a level
+    are summarized concurrently.
+    """
+    groups = {name: list(entries) for name, entries in groups.items()}
+    while True:
+        items, owners = [], []
+        for name, entries in groups.items():
+            if len(entries) <= REDUCE_FANOUT:
+                continue
+            for start in range(0, len(entries), REDUCE_FANOUT):
+                part = entries[start:start + REDUCE_FANOUT]
+                summaries = bullet_list(part)
+                items.append((content_key(kind, name, summaries), {"path": name or ".", "summaries": summaries}))
+                owners.append((name, f"{part[0][0]} .. {part[-1][0]}"))
+        if not items:
+            return groups
+        outputs = cached_batch(chain, cache, kind, items, max_concurrency)
+        collapsed = {}
+        for (name, label), output in zip(owners, outputs):
+            collapsed.setdefault(name, []).append((label, output))
+        groups.update(collapsed)
+
+
+def reduce_groups(chain, cache, kind, groups, max_concurrency):
+    """Reduce each named group of (path, summary) entries to one summary, concurrently"""
+    groups = collapse_groups(chain, cache, kind, groups, max_concurrency)
+    names = sorted(groups)
+    items = []
+    for name in names:
+        summaries = bullet_list(groups[name])
+        items.append((content_key(kind, name, summaries), {"path": name, "summaries": summaries}))
+    return dict(zip(names, cached_batch(chain, cache, kind, items, max_concurrency)))
+
+
+def summarize_repo(repo_path, project_name, llm, cache, documents=None, max_concurrency=MAX_CONCURRENCY):
+    """Hierarchical map-reduce over the repository's chunks.
+
+    Chunks are summarized concurrently (map), then reduced to file summaries,
+    then to directory summaries level by level from the deepest up, and finally
+    to a repository summary. Every summary is cached by a hash of its inputs,
+    so after a small change only the changed chunks and everything above them
+    are summarized again.
+    """
+    if documents is None:
+        # The generated README would otherwise change the root summary on every run
+        documents = analyze_repo(repo_path, extra_ignores=["/README.md"])
+    chunk_chain = CHUNK_SUMMARY_PROMPT | llm | StrOutputParser()
+    file_chain = FILE_SUMMARY_PROMPT | llm | StrOutputParser()
+    directory_chain = DIRECTORY_SUMMARY_PROMPT | llm | StrOutputParser()
+    repo_chain = REPO_SUMMARY_PROMPT | llm | StrOutputParser()
+
+    # Map: every chunk of every file at once, bounded by max_concurrency
+    items = [
+        (content_key("chunk", document.metadata["source"], document.page_content),
+         {"path": document.metadata["source"], "content": document.page_content})
+        for document in documents
+    ]
+    chunk_summaries = cached_batch(chunk_chain, cache, "chunk", items, max_concurrency)
+    chunks_by_file = {}
+    for document, summary in zip(documents, chunk_summaries):
+        chunks_by_file.setdefault(document.metadata["source"], []).append(summary)
+
+    # Reduce chunks to files; a single-chunk file already has its summary
+    file_summaries = {path: chunks[0] for path, chunks in chunks_by_file.items() if len(chunks) == 1}
+    multi_chunk = {
+        path: [(f"part {i + 1}", summary) for i, summary in enumerate(chunks)]
+        for path, chunks in chunks_by_file.items() if len(chunks) > 1
+    }
+    file_summaries.update(reduce_groups(file_chain, cache, "file", multi_chunk, max_concurrency))
+
+    children = {"": []}
+    for path, summary in sorted(file_summaries.items()):
+        directory = os.path.dirname(path)
+        children.setdefault(directory, []).append((path, summary))
+        while directory:
+            directory = os.path.dirname(directory)
+            children.setdefault(directory, [])
+
+    # Reduce directories one depth level at a time, deepest first
+    directory_summaries = {}
+    depths = sorted({d.count("/") + 1 for d in children if d}, reverse=True)
+    for depth in depths:
+        level = {d: entries for d, entries in children.items() if d and d.count("/") + 1 == depth}
+        directory_summaries.update(reduce_groups(directory_chain, cache, "directory", level, max_concurrency))
+        for directory in level:
+            children[os.path.dirname(directory)].append((directory + "/", directory_summaries[directory]))
+
+    top_level = collapse_groups(directory_chain, cache, "directory", {"": sorted(children[""])}, max_concurrency)[""]
+    summaries = bullet_list(top_level)
+    repo_summary = cached_batch(
+        repo_chain, cache, "repo",
+        [(content_key("repo", project_name, summaries), {"project_name": project_name, "summaries": summaries})],
+        max_concurrency,
+    )[0]
+
+    return {
+        "files": file_summaries,
+        "directories": directory_summaries,
+        "repo": repo_summary,
+    }
+
+
+def relevant_files(file_summaries, hints):
+    """File summaries whose path mentions one of the hints, shortest paths first"""
+    matches = [
+        (path, summary) for path, summary in file_summaries.items()
+        if any(hint in path.lower() for hint in hints)
+    ]
+    return sorted(matches, key=lambda entry: (entry[0].count("/"), entry[0]))[:SECTION_FILES]
+
+
+def render_structure(repo_path, directory_summaries):
+    """Bounded directory tree with counts, sizes and languages, annotated with directory summaries"""
+    annotations = {
+        directory: truncate_summary(summary)
+        for directory, summary in directory_summaries.items()
+    }
+    tree = render_tree(extract_structure(repo_path, extra_ignores=["/README.md"]), annotations=annotations)
+    return f"```\n{tree}\n```"
+
+
+def truncate_summary(summary, max_length=80):
+    sentence = summary.strip().split("\n")[0].split(". ")[0].rstrip(".")
+    return sentence if len(sentence) <= max_length else sentence[:max_length - 3] + "..."
+
+
+def readme_sections(repo_path, project_name, summaries, llm, cache, max_concurrency=MAX_CONCURRENCY):
+    """Fill the README template inputs from the map-reduce summaries"""
+    section_chain = SECTION_PROMPT | llm | StrOutputParser()
+    items = []
+    for section, hints in SECTION_HINTS.items():
+        files = bullet_list(relevant_files(summaries["files"], hints)) or "No specific files found."
+        inputs = {"section": section, "project_name": project_name, "description": summaries["repo"], "summaries": files}
+        items.append((content_key("section", section, project_name, summaries["repo"], files), inputs))
+    installation, usage = cached_batch(section_chain, cache, "section", items, max_concurrency)
+    return {
+        "description": summaries["repo"],
+        "structure": render_structure(repo_path, summaries["directories"]),
+        "installation": installation,
+        "usage": usage,
+    }
+
+
 def generate_prompt(project_name, template_type="detailed"):
     if template_type == "minimal":
         return PromptTemplate.from_template("""
@@ -178,21 +357,24 @@ Generated with ❤️ using the AI-powered README Generator.
 """)
 
 
-def create_readme(repo_path, project_name, template_type="detailed"):
-    llm = ChatOpenAI(model="gpt-3.5-turbo")
+def create_readme(repo_path, project_name, template_type="detailed", cache=None, max_concurrency=MAX_CONCURRENCY,
+                  llm=None, documents=None):
+    llm = llm or ChatOpenAI(model="gpt-3.5-turbo")
     prompt = generate_prompt(project_name, template_type)
-    chain = LLMChain(llm=llm, prompt=prompt)
+    chain = prompt | llm | StrOutputParser()
+    cache = cache or SummaryCache()
+
+    summaries = summarize_repo(repo_path, project_name, llm, cache, documents, max_concurrency)
 
     inputs = {
         "project_name": project_name,
-        "description": "Extracted or summarized description of the project.",
-        "usage": "Auto-generated usage instructions.",
-        "installation": "Installation steps derived from dependencies.",
-        "structure": "Auto-detected directory structure.",
         "contributing": "Contribution guidelines (if available)."
     }
+    inputs.update(readme_sections(repo_path, project_name, summaries, llm, cache, max_concurrency))
 
-    readme_content = chain.run(inputs)
+    # Unchanged inputs give an unchanged README, so skip the final generation too
+    key = content_key("readme", template_type, json.dumps(inputs, sort_keys=True))
+    readme_content = cache.get_or_create(key, "readme", lambda: chain.invoke(inputs))
     return readme_content
 
 
@@ -204,17 +386,28 @@ if __name__ == "__main__":
     parser.add_argument("--repo-name", required=True, help="GitHub repository name.")
     parser.add_argument("--branch-name", default="readme-update", help="Branch name.")
     parser.add_argument("--template", default="detailed", help="Template type.")
+    parser.add_argument("--api-url", default=DEFAULT_API_URL, help="GitHub API base URL.")
+    parser.add_argument("--github-cache-dir", default=DEFAULT_CACHE_DIR, help="Directory for cached GitHub responses.")
+    parser.add_argument("--graphql", action="store_true", help="Fetch repository metadata in one GraphQL query.")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY, help="Concurrent LLM summarization calls.")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached summaries and regenerate everything.")
     args = parser.parse_args()
 
+    # One client for every GitHub call; unchanged metadata is revalidated with ETags
+    github = GitHubClient(args.github_token, api_url=args.api_url, cache_dir=args.github_cache_dir)
+
     # Fetch repo details
-    details = fetch_repo_details(args.github_token, args.repo_name)
+    details = fetch_repo_details(github, args.repo_name, use_graphql=args.graphql)
 
     # Parse dependencies
     python_deps = parse_python_dependencies(args.repo)
     node_deps = parse_node_dependencies(args.repo)
 
-    # Generate README
-    readme_content = create_readme(args.repo, details["name"], args.template)
+    # Generate README, reusing summaries of unchanged files from the repo's cache directory
+    cache = SummaryCache() if args.no_cache else SummaryCache.for_repo(args.repo)
+    readme_content = create_readme(args.repo, details["name"], args.template, cache=cache, max_concurrency=args.concurrency)
+    print(f"Summary cache: {cache.hits} hits, {cache.misses} misses, {cache.prune()} stale entries removed")
+    cache.close()
     readme_content += f"\n\n## Dependencies\n### Python\n{python_deps}\n### Node.js\n{node_deps}"
 
     # Save README
@@ -226,6 +419,8 @@ if __name__ == "__main__":
 
     # Optionally push to GitHub
     pr_url = create_pull_request(
-        args.github_token, args.repo_name, args.branch_name, f"{args.repo}/README.md", "Update README"
+        github, args.repo_name, args.branch_name, f"{args.repo}/README.md", "Update README",
+        base=details["default_branch"],
     )
     print(f"Pull request created: {pr_url}")
+    print(f"GitHub API: {github.requests} requests, {github.not_modified} not modified")
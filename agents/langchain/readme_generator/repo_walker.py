@@ -0,0 +1,202 @@
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+# Always skipped, even when a repository has no .gitignore
+DEFAULT_IGNORES = [".git/", "node_modules/", "__pycache__/", ".venv/", "venv/", ".tox/", ".readme_cache/"]
+
+SNIFF_BYTES = 8000
+MAX_FILE_BYTES = 1024 * 1024
+MAX_TOTAL_BYTES = 64 * 1024 * 1024
+
+
+# Gitignore Matching
+def _glob_to_regex(pattern):
+    i, regex = 0, ""
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+            continue
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex += f"[{body}]"
+                i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            regex += re.escape(pattern[i])
+        else:
+            regex += re.escape(char)
+        i += 1
+    return regex
+
+
+class GitignoreRule:
+    def __init__(self, base, pattern):
+        self.base = base
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        anchored = "/" in pattern
+        regex = _glob_to_regex(pattern.lstrip("/"))
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        self.regex = re.compile(regex + "$")
+
+    def matches(self, rel_path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+        return self.regex.match(rel_path) is not None
+
+
+class GitignoreMatcher:
+    """Gitignore rules collected from the repository root and its subdirectories"""
+
+    def __init__(self, patterns=None):
+        self.rules: List[GitignoreRule] = []
+        # Directory-only rules never apply to files, so files skip them entirely
+        self.file_rules: List[GitignoreRule] = []
+        for pattern in patterns or []:
+            self.add_pattern("", pattern)
+
+    def add_pattern(self, base, line):
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            return
+        if line.startswith("\\#") or line.startswith("\\!"):
+            line = line[1:]
+        rule = GitignoreRule(base, line)
+        self.rules.append(rule)
+        if not rule.dir_only:
+            self.file_rules.append(rule)
+
+    def load(self, directory, base=""):
+        """Read the .gitignore in directory, if any; base is its path relative to the root"""
+        path = os.path.join(directory, ".gitignore")
+        if not os.path.isfile(path):
+            return
+        with open(path, "r", errors="replace") as file:
+            for line in file:
+                self.add_pattern(base, line)
+
+    def ignored(self, rel_path, is_dir):
+        # The last matching rule decides, so search from the end and stop at the first match
+        for rule in reversed(self.rules if is_dir else self.file_rules):
+            if rule.matches(rel_path, is_dir):
+                return not rule.negate
+        return False
+
+
+# Repository Walker
+def walk_repository(repo_path, extra_ignores=None) -> Iterator[Tuple[str, str, int]]:
+    """Yield (path, relative path, size) for every file not excluded by .gitignore"""
+    matcher = GitignoreMatcher(DEFAULT_IGNORES + list(extra_ignores or []))
+    pending = [("", repo_path)]
+    while pending:
+        rel_dir, directory = pending.pop()
+        matcher.load(directory, rel_dir)
+        try:
+            with os.scandir(directory) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file(follow_symlinks=False):
+                    continue
+                if matcher.ignored(rel_path, is_dir):
+                    continue
+                if is_dir:
+                    subdirs.append((rel_path, entry.path))
+                else:
+                    yield entry.path, rel_path, entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+        # Depth-first in name order, so output is stable between runs
+        pending.extend(reversed(subdirs))
+
+
+def is_binary(data: bytes) -> bool:
+    """Same heuristic as git: a NUL byte near the start means binary"""
+    return b"\0" in data[:SNIFF_BYTES]
+
+
+def read_text(path) -> Optional[str]:
+    with open(path, "rb") as file:
+        data = file.read()
+    if is_binary(data):
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+def load_documents(
+    repo_path,
+    max_file_bytes=MAX_FILE_BYTES,
+    max_total_bytes=MAX_TOTAL_BYTES,
+    workers=8,
+    extra_ignores=None,
+) -> Iterator[Document]:
+    """Stream text files of a repository as Documents, reading them in parallel.
+
+    Files larger than max_file_bytes are skipped and the walk stops once
+    max_total_bytes have been scheduled for reading. Binary files are
+    detected by content and skipped.
+    """
+    total = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for path, rel_path, size in walk_repository(repo_path, extra_ignores):
+            if size > max_file_bytes:
+                continue
+            if total + size > max_total_bytes:
+                break
+            total += size
+            in_flight.append((rel_path, executor.submit(read_text, path)))
+            # Bounded read-ahead keeps memory flat while the splitter consumes documents
+            if len(in_flight) >= workers * 2:
+                document = _to_document(*in_flight.popleft())
+                if document is not None:
+                    yield document
+        while in_flight:
+            document = _to_document(*in_flight.popleft())
+            if document is not None:
+                yield document
+
+
+def _to_document(rel_path, future) -> Optional[Document]:
+    try:
+        text = future.result()
+    except OSError:
+        return None
+    if text is None:
+        return None
+    return Document(page_content=text, metadata={"source": rel_path})
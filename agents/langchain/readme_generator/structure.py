@@ -0,0 +1,145 @@
+import os
+from collections import Counter
+
+from repo_walker import DEFAULT_IGNORES, GitignoreMatcher
+
+
+MAX_DEPTH = 4
+MAX_CHILDREN = 12
+MAX_TOKENS = 800
+# Stop scanning after this many entries so huge trees stay fast; counts are then lower bounds
+MAX_ENTRIES = 200_000
+
+LANGUAGES = {
+    ".py": "Python", ".pyi": "Python", ".ipynb": "Jupyter Notebook",
+    ".js": "JavaScript", ".jsx": "JavaScript", ".mjs": "JavaScript", ".cjs": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript",
+    ".java": "Java", ".kt": "Kotlin", ".scala": "Scala", ".go": "Go", ".rs": "Rust",
+    ".c": "C", ".h": "C", ".cc": "C++", ".cpp": "C++", ".hpp": "C++", ".cs": "C#",
+    ".rb": "Ruby", ".php": "PHP", ".swift": "Swift", ".m": "Objective-C",
+    ".sh": "Shell", ".bash": "Shell", ".ps1": "PowerShell",
+    ".html": "HTML", ".css": "CSS", ".scss": "SCSS", ".vue": "Vue", ".svelte": "Svelte",
+    ".sql": "SQL", ".r": "R", ".jl": "Julia", ".lua": "Lua", ".dart": "Dart",
+    ".md": "Markdown", ".rst": "reStructuredText",
+    ".json": "JSON", ".yaml": "YAML", ".yml": "YAML", ".toml": "TOML",
+}
+
+
+class DirNode:
+    """Counts for one directory, including everything below it"""
+
+    def __init__(self, name, rel_path):
+        self.name = name
+        self.rel_path = rel_path
+        self.files = []
+        self.children = []
+        self.file_count = 0
+        self.size = 0
+        self.languages = Counter()
+
+
+def extract_structure(repo_path, max_entries=MAX_ENTRIES, extra_ignores=None):
+    """Scan the repository with os.scandir into a DirNode tree, honouring .gitignore"""
+    matcher = GitignoreMatcher(DEFAULT_IGNORES + list(extra_ignores or []))
+    budget = [max_entries]
+
+    def scan(directory, node):
+        matcher.load(directory, node.rel_path)
+        try:
+            with os.scandir(directory) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError:
+            return
+        for entry in entries:
+            if budget[0] <= 0:
+                return
+            budget[0] -= 1
+            rel_path = f"{node.rel_path}/{entry.name}" if node.rel_path else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file(follow_symlinks=False):
+                    continue
+                if matcher.ignored(rel_path, is_dir):
+                    continue
+                if is_dir:
+                    child = DirNode(entry.name, rel_path)
+                    scan(entry.path, child)
+                    node.children.append(child)
+                    node.file_count += child.file_count
+                    node.size += child.size
+                    node.languages.update(child.languages)
+                else:
+                    size = entry.stat(follow_symlinks=False).st_size
+                    node.files.append((entry.name, size))
+                    node.file_count += 1
+                    node.size += size
+                    dot = entry.name.rfind(".")
+                    language = LANGUAGES.get(entry.name[dot:].lower()) if dot > 0 else None
+                    if language:
+                        node.languages[language] += size
+            except OSError:
+                continue
+
+    root = DirNode(os.path.basename(os.path.abspath(repo_path)), "")
+    scan(repo_path, root)
+    return root
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def language_breakdown(languages, limit=3):
+    total = sum(languages.values())
+    if not total:
+        return ""
+    return ", ".join(f"{name} {100 * size / total:.0f}%" for name, size in languages.most_common(limit))
+
+
+def _render(node, depth, max_children, annotations, prefix="", lines=None):
+    lines = [] if lines is None else lines
+    # Largest first, ties by name, so the tree (and the cache key built from it) is stable across runs
+    children = sorted(node.children, key=lambda child: (-child.size, child.name))
+    files = sorted(node.files, key=lambda file: (-file[1], file[0]))
+    entries = [("dir", child) for child in children] + [("file", file) for file in files]
+    shown = entries[:max_children]
+    hidden = entries[max_children:]
+    for i, (kind, entry) in enumerate(shown):
+        last = i == len(shown) - 1 and not hidden
+        branch = "└── " if last else "├── "
+        if kind == "file":
+            lines.append(f"{prefix}{branch}{entry[0]}")
+            continue
+        details = f"{entry.file_count} files, {format_size(entry.size)}"
+        languages = language_breakdown(entry.languages, limit=2)
+        if languages:
+            details += f"; {languages}"
+        note = annotations.get(entry.rel_path)
+        lines.append(f"{prefix}{branch}{entry.name}/ ({details})" + (f" - {note}" if note else ""))
+        if depth > 1:
+            _render(entry, depth - 1, max_children, annotations, prefix + ("    " if last else "│   "), lines)
+    if hidden:
+        hidden_dirs = sum(kind == "dir" for kind, _ in hidden)
+        lines.append(f"{prefix}└── ... {len(hidden) - hidden_dirs} more files, {hidden_dirs} more directories")
+    return lines
+
+
+def render_tree(root, max_depth=MAX_DEPTH, max_children=MAX_CHILDREN, max_tokens=MAX_TOKENS, annotations=None):
+    """Render the tree within about max_tokens tokens, dropping depth until it fits.
+
+    annotations maps directory paths to short notes shown next to them.
+    """
+    annotations = annotations or {}
+    header = [f"{root.name}/ ({root.file_count} files, {format_size(root.size)})"]
+    languages = language_breakdown(root.languages, limit=5)
+    if languages:
+        header.append(f"Languages: {languages}")
+    budget = max_tokens * 4  # roughly four characters per token
+    for depth in range(max_depth, 0, -1):
+        text = "\n".join(header + _render(root, depth, max_children, annotations))
+        if len(text) <= budget:
+            return text
+    return text[:budget].rsplit("\n", 1)[0] + "\n..."
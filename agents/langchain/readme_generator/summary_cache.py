@@ -0,0 +1,78 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+
+CACHE_DIR = ".readme_cache"
+
+# Bump when the summary prompts change so old summaries are not reused
+SUMMARY_VERSION = "1"
+
+
+def content_key(kind, *parts):
+    """Stable key for a summary of the given kind over the given inputs"""
+    digest = hashlib.sha256(f"{SUMMARY_VERSION}:{kind}".encode("utf-8"))
+    for part in parts:
+        digest.update(b"\0")
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Summaries keyed by content hash, stored in SQLite inside the repository's cache directory"""
+
+    def __init__(self, path=":memory:"):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, kind TEXT NOT NULL, summary TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self.hits = 0
+        self.misses = 0
+        self._used = set()
+
+    @classmethod
+    def for_repo(cls, repo_path):
+        return cls(os.path.join(repo_path, CACHE_DIR, "summaries.sqlite3"))
+
+    def get(self, key):
+        self._used.add(key)
+        row = self.conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key, kind, summary):
+        self._used.add(key)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO summaries (key, kind, summary, updated) VALUES (?, ?, ?, ?)",
+            (key, kind, summary, time.time()),
+        )
+        self.conn.commit()
+
+    def get_or_create(self, key, kind, create):
+        """Return the cached summary for key, calling create() only on a miss"""
+        summary = self.get(key)
+        if summary is None:
+            summary = create()
+            self.put(key, kind, summary)
+        return summary
+
+    def prune(self):
+        """Drop summaries not used since this cache was opened, e.g. of deleted or changed files"""
+        used = list(self._used)
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS used_keys (key TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM used_keys")
+        self.conn.executemany("INSERT OR IGNORE INTO used_keys (key) VALUES (?)", [(key,) for key in used])
+        removed = self.conn.execute("DELETE FROM summaries WHERE key NOT IN (SELECT key FROM used_keys)").rowcount
+        self.conn.commit()
+        return removed
+
+    def close(self):
+        self.conn.close()
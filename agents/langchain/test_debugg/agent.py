@@ -10,11 +10,11 @@ from loguru import logger
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from langchain.schema import HumanMessage, AIMessage
-from langchain.memory import ConversationBufferMemory
 from langchain.agents import Tool, create_openai_functions_agent, AgentExecutor
 from langchain.prompts import ChatPromptTemplate
 from langchain_community.chat_models import ChatOpenAI
 from langchain_core.runnables import RunnableParallel
+from token_memory import TokenBudgetMemory
 
 
 # Function to query the LM-Studio local LLM API
@@ -170,7 +170,8 @@ dependency_agent = create_openai_functions_agent(
 
 
 # Shared Memory
-shared_memory = ConversationBufferMemory()
+# Bounded to 2000 tokens: recent turns verbatim, older turns folded into a background summary
+shared_memory = TokenBudgetMemory(llm=ChatOpenAI(model="gpt-3.5-turbo", temperature=0), max_token_limit=2000)
 
 # Agents with Shared Memory
 critical_agent_executor = AgentExecutor(agent=critical_agent, memory=shared_memory, verbose=True)
@@ -221,3 +222,4 @@ queries = [
 for query in queries:
     response = execute_query_dynamically(query)
     print(f"Query: {query}\nResponse: {response}\n")
+    print(f"Shared memory: {shared_memory.token_count} tokens\n")
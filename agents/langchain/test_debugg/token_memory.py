@@ -0,0 +1 @@
+../token_memory.py
\ No newline at end of file
@@ -0,0 +1,189 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from langchain_core.memory import BaseMemory
+from pydantic import PrivateAttr
+
+
+SUMMARY_PROMPT = """Progressively summarize the conversation, adding onto the previous summary and returning a new summary.
+Keep names, decisions, file names, errors and open tasks; drop pleasantries and code listings.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+New summary:"""
+
+# Seconds before retrying a failed summary update, doubling per failure up to RETRY_MAX
+RETRY_BASE = 5
+RETRY_MAX = 300
+
+
+class TokenBudgetMemory(BaseMemory):
+    """Conversation memory that never exceeds max_token_limit tokens.
+
+    The most recent turns are kept verbatim. Turns that no longer fit are
+    folded into a rolling summary by a background thread, so save_context()
+    never waits for the LLM; evicted turns show up in the summary once that
+    update finishes. If the update fails, the turns stay pending and are
+    retried with backoff on a later save_context(). Messages longer than
+    max_message_tokens (for example whole generated programs) are truncated
+    when saved.
+
+    llm is a LangChain chat model or LLM, or any callable taking a prompt
+    string and returning the summary text.
+    """
+
+    llm: Any
+    max_token_limit: int = 2000
+    summary_token_limit: int = 500
+    max_message_tokens: int = 400
+    memory_key: str = "history"
+    input_key: Optional[str] = None
+    output_key: Optional[str] = None
+    human_prefix: str = "Human"
+    ai_prefix: str = "AI"
+
+    _messages: List = PrivateAttr(default_factory=list)
+    _pending: List = PrivateAttr(default_factory=list)
+    _summary: str = PrivateAttr(default="")
+    _summary_tokens: int = PrivateAttr(default=0)
+    _summarizing: bool = PrivateAttr(default=False)
+    _summaries: int = PrivateAttr(default=0)
+    _failures: int = PrivateAttr(default=0)
+    _retry_at: float = PrivateAttr(default=0.0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _idle: Any = PrivateAttr(default=None)
+    _executor: Any = PrivateAttr(default=None)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._idle = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    # Token accounting
+    def count_tokens(self, text: str) -> int:
+        if hasattr(self.llm, "get_num_tokens"):
+            try:
+                return self.llm.get_num_tokens(text)
+            except Exception:
+                pass
+        return (len(text) + 3) // 4
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if self.count_tokens(text) <= max_tokens:
+            return text
+        # Shrink by the overshoot ratio until the text and the marker fit
+        max_tokens -= self.count_tokens(" [...]")
+        while text and self.count_tokens(text) > max_tokens:
+            text = text[: int(len(text) * max_tokens / self.count_tokens(text) * 0.95)]
+        return text + " [...]"
+
+    @property
+    def token_count(self) -> int:
+        """Tokens the memory adds to a prompt right now"""
+        with self._lock:
+            return self._summary_tokens + sum(tokens for _, tokens in self._messages)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            recent = sum(tokens for _, tokens in self._messages)
+            return {
+                "tokens": self._summary_tokens + recent,
+                "summary_tokens": self._summary_tokens,
+                "recent_tokens": recent,
+                "recent_messages": len(self._messages),
+                "pending_messages": len(self._pending),
+                "summaries": self._summaries,
+                "summary_failures": self._failures,
+            }
+
+    # Memory interface
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, str]:
+        with self._lock:
+            lines = [f"Summary of earlier conversation: {self._summary}"] if self._summary else []
+            lines.extend(line for line, _ in self._messages)
+        return {self.memory_key: "\n".join(lines)}
+
+    def _value(self, values: Dict[str, Any], key: Optional[str], exclude=()) -> str:
+        if key is None:
+            keys = [k for k in values if k not in exclude and k != self.memory_key]
+            key = "output" if "output" in keys else keys[0]
+        return str(values[key])
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        new_lines = []
+        for prefix, text in (
+            (self.human_prefix, self._value(inputs, self.input_key, exclude=("stop",))),
+            (self.ai_prefix, self._value(outputs, self.output_key)),
+        ):
+            line = f"{prefix}: {self.truncate(text, self.max_message_tokens)}"
+            new_lines.append((line, self.count_tokens(line)))
+
+        with self._lock:
+            self._messages.extend(new_lines)
+            recent_limit = self.max_token_limit - self.summary_token_limit
+            recent = sum(tokens for _, tokens in self._messages)
+            while self._messages and recent > recent_limit:
+                line, tokens = self._messages.pop(0)
+                self._pending.append(line)
+                recent -= tokens
+            if self._pending and not self._summarizing and time.monotonic() >= self._retry_at:
+                self._summarizing = True
+                self._executor.submit(self._summarize)
+
+    def _summarize(self):
+        """Fold pending lines into the summary until none are left"""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._summarizing = False
+                    self._idle.notify_all()
+                    return
+                new_lines, self._pending = self._pending, []
+                summary = self._summary
+            prompt = SUMMARY_PROMPT.format(summary=summary or "(none)", new_lines="\n".join(new_lines))
+            try:
+                result = self.llm.invoke(prompt) if hasattr(self.llm, "invoke") else self.llm(prompt)
+                summary = getattr(result, "content", result).strip()
+            except Exception as e:
+                # Put the lines back and retry later rather than losing them
+                with self._lock:
+                    self._pending = new_lines + self._pending
+                    self._failures += 1
+                    backoff = min(RETRY_BASE * 2 ** (self._failures - 1), RETRY_MAX)
+                    self._retry_at = time.monotonic() + backoff
+                    self._summarizing = False
+                    self._idle.notify_all()
+                print(f"Could not update the conversation summary, retrying in {backoff}s: {e}")
+                return
+            summary = self.truncate(summary, self.summary_token_limit)
+            tokens = self.count_tokens(summary) if summary else 0
+            with self._lock:
+                self._summary = summary
+                self._summary_tokens = tokens
+                self._summaries += 1
+                self._failures = 0
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the background summary is up to date"""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._summarizing, timeout)
+
+    def clear(self) -> None:
+        self.wait()
+        with self._lock:
+            self._messages = []
+            self._pending = []
+            self._summary = ""
+            self._summary_tokens = 0
+            self._failures = 0
+            self._retry_at = 0.0
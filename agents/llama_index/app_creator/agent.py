@@ -1,4 +1,9 @@
-from typing import Dict, Any, Optional
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
 from llama_index.core import Settings
 from llama_index.llms import LlamaCPP
 from dataclasses import dataclass
@@ -6,6 +11,29 @@ from enum import Enum
 
 MAX_REVIEWS = 3
 
+# Every prompt starts with the same instructions and specification so the
+# local server can reuse its prompt/KV cache for this prefix across the
+# architect -> reviewer -> coder loop. Only the role-specific tail changes.
+PROMPT_PREFIX = """You are part of a small team building an app from a specification.
+The architect writes the first version, the reviewer checks it and the coder improves it.
+Whenever you return code, return each file in full and don't supply any reasoning, just code.
+This is the specification: <spec>{spec}</spec>
+"""
+
+ARCHITECT_PROMPT = PROMPT_PREFIX + """
+Task: Build the app. Make a plan for the directory structure you'll need, then return each file in full."""
+
+REVIEWER_PROMPT = PROMPT_PREFIX + """
+Task: Review the code below. Check the code quality and whether it correctly implements the specification.
+If you're satisfied, just return 'Looks great', nothing else.
+If not, return a review with a list of changes you'd like to see.
+<code>{code}</code>"""
+
+CODER_PROMPT = PROMPT_PREFIX + """
+Task: Improve the code below based on the review, keep the specification in mind, and return the full updated code.
+<code>{code}</code>
+<review>{review}</review>"""
+
 class EventType(Enum):
     START = "start"
     CODE = "code"
@@ -19,19 +47,179 @@ class Event:
     type: EventType
     data: Dict[str, Any]
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type.value, "data": self.data}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Event":
+        return cls(type=EventType(data["type"]), data=data["data"])
+
+@dataclass
+class Step:
+    """A completed step of a run as recorded in its checkpoint"""
+    name: str
+    input: Event
+    output: Event
+    events: List[Event]
+
+class Checkpoint:
+    """Append-only JSON lines log of a run's emitted events, context store and completed steps"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @classmethod
+    def for_run(cls, checkpoint_dir: str, run_id: str) -> "Checkpoint":
+        return cls(os.path.join(checkpoint_dir, f"{run_id}.jsonl"))
+
+    def append(self, record: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def records(self) -> List[Dict[str, Any]]:
+        """All readable records; a line torn by a crash is skipped"""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+    def completed(self) -> List[Dict[str, Any]]:
+        """Records belonging to completed steps, dropping those of a step that never finished"""
+        completed, pending = [], []
+        for record in self.records():
+            if record["kind"] == "resume":
+                pending = []
+            elif record["kind"] == "step":
+                completed.extend(pending)
+                completed.append(record)
+                pending = []
+            else:
+                pending.append(record)
+        return completed
+
+    def steps(self) -> List[Step]:
+        """Completed steps in order, for offline replay and debugging"""
+        steps, events = [], []
+        for record in self.completed():
+            if record["kind"] == "event":
+                events.append(Event.from_dict(record["event"]))
+            elif record["kind"] == "step":
+                steps.append(Step(
+                    name=record["step"],
+                    input=Event.from_dict(record["input"]),
+                    output=Event.from_dict(record["output"]),
+                    events=events,
+                ))
+                events = []
+        return steps
+
 class Context:
-    def __init__(self):
+    def __init__(self, checkpoint: Optional[Checkpoint] = None):
         self._store: Dict[str, Any] = {}
         self._stream: list[Event] = []
+        self._checkpoint = checkpoint
     
     def set(self, key: str, value: Any) -> None:
         self._store[key] = value
+        if self._checkpoint is not None:
+            self._checkpoint.append({"kind": "set", "key": key, "value": value})
     
     def get(self, key: str, default: Any = None) -> Any:
         return self._store.get(key, default)
     
     def write_event(self, event: Event) -> None:
         self._stream.append(event)
+        if self._checkpoint is not None:
+            self._checkpoint.append({"kind": "event", "event": event.to_dict()})
+
+    def attach(self, checkpoint: Checkpoint) -> None:
+        """Persist every later set() and write_event() to the checkpoint"""
+        self._checkpoint = checkpoint
+
+    def restore(self, records: List[Dict[str, Any]]) -> None:
+        """Rebuild the store and event stream from checkpoint records without writing them again"""
+        for record in records:
+            if record["kind"] == "set":
+                self._store[record["key"]] = record["value"]
+            elif record["kind"] == "event":
+                self._stream.append(Event.from_dict(record["event"]))
+
+@dataclass
+class CacheStats:
+    """Counters for the review memo and the shared prompt prefix.
+
+    prefix_chars_reused and shared_prefix_ratio are measured on the client: how
+    much of each prompt repeats the start of the previous one. That is an upper
+    bound on what the server's KV cache can reuse, not a measured cache hit.
+    server_cached_tokens sums the cached prompt tokens the server reported, for
+    the server_reports responses that included the count.
+    """
+    review_hits: int = 0
+    review_misses: int = 0
+    prompt_chars: int = 0
+    prefix_chars_reused: int = 0
+    server_cached_tokens: int = 0
+    server_reports: int = 0
+
+    @property
+    def review_hit_rate(self) -> float:
+        total = self.review_hits + self.review_misses
+        return self.review_hits / total if total else 0.0
+
+    @property
+    def shared_prefix_ratio(self) -> float:
+        return self.prefix_chars_reused / self.prompt_chars if self.prompt_chars else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "review_hits": self.review_hits,
+            "review_misses": self.review_misses,
+            "review_hit_rate": self.review_hit_rate,
+            "prompt_chars": self.prompt_chars,
+            "prefix_chars_reused": self.prefix_chars_reused,
+            "shared_prefix_ratio": self.shared_prefix_ratio,
+            "server_cached_tokens": self.server_cached_tokens,
+            "server_reports": self.server_reports,
+        }
+
+def review_key(spec: str, code: str) -> str:
+    """Hash of specification and code used to memoize reviews"""
+    digest = hashlib.sha256()
+    digest.update(spec.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(code.encode("utf-8"))
+    return digest.hexdigest()
+
+def common_prefix_length(a: str, b: str) -> int:
+    """Number of leading characters shared by two strings"""
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+def _field(obj: Any, name: str) -> Any:
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+def reported_cached_tokens(raw: Any) -> Optional[int]:
+    """Cached prompt tokens reported in a raw completion response (dict or object), if the server includes them"""
+    if raw is None:
+        return None
+    candidates = [
+        _field(_field(_field(raw, "usage"), "prompt_tokens_details"), "cached_tokens"),  # OpenAI-compatible servers
+        _field(raw, "tokens_cached"),  # llama.cpp server
+        _field(_field(raw, "timings"), "cache_n"),
+    ]
+    return next((value for value in candidates if isinstance(value, int) and not isinstance(value, bool)), None)
 
 def truncate(text: str, max_length: int = 60) -> str:
     """Helper function to truncate long strings"""
@@ -40,18 +228,39 @@ def truncate(text: str, max_length: int = 60) -> str:
     return text[:max_length] + "..."
 
 class AppCreatorAgent:
-    def __init__(self, model_path: str = None):
+    def __init__(self, model_path: str = None, checkpoint_dir: Optional[str] = None, llm: Any = None):
         if model_path is None:
             model_path = "http://localhost:1234/v1"  # Default LM-Studio local server
         
-        Settings.llm = LlamaCPP(
-            model_url=model_path,
-            temperature=0.7,
-            context_window=4096,
-            max_tokens=2048,
-            generate_kwargs={"temperature": 0.7}
-        )
+        if llm is None:
+            llm = LlamaCPP(
+                model_url=model_path,
+                temperature=0.7,
+                context_window=4096,
+                max_tokens=2048,
+                generate_kwargs={"temperature": 0.7}
+            )
+        Settings.llm = llm
         self.context = Context()
+        self.cache_stats = CacheStats()
+        self._reviews: Dict[str, str] = {}
+        self._last_prompt = ""
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint: Optional[Checkpoint] = None
+        self.run_id: Optional[str] = None
+        self.step_durations: List[Tuple[str, float]] = []
+
+    async def complete(self, prompt: str) -> str:
+        """Send a prompt to the LLM, tracking how much of it repeats the previous prompt"""
+        self.cache_stats.prompt_chars += len(prompt)
+        self.cache_stats.prefix_chars_reused += common_prefix_length(self._last_prompt, prompt)
+        self._last_prompt = prompt
+        response = await Settings.llm.complete(prompt)
+        cached = reported_cached_tokens(getattr(response, "raw", None))
+        if cached is not None:
+            self.cache_stats.server_cached_tokens += cached
+            self.cache_stats.server_reports += 1
+        return response.text
 
     async def architect(self, event: Event) -> Event:
         """Write initial code based on specification"""
@@ -62,12 +271,8 @@ class AppCreatorAgent:
             data={"msg": f"Writing app using this specification: {truncate(spec)}"}
         ))
 
-        prompt = f"""Build an app for this specification: <spec>{spec}</spec>. 
-        Make a plan for the directory structure you'll need, then return each file in full. 
-        Don't supply any reasoning, just code."""
-        
-        code = await Settings.llm.complete(prompt)
-        return Event(type=EventType.CODE, data={"code": code.text})
+        code = await self.complete(ARCHITECT_PROMPT.format(spec=spec))
+        return Event(type=EventType.CODE, data={"code": code})
 
     async def coder(self, event: Event) -> Event:
         """Update code based on review"""
@@ -79,18 +284,12 @@ class AppCreatorAgent:
             data={"msg": f"Update code based on review: {truncate(review)}"}
         ))
 
-        prompt = f"""We need to improve code that should implement this specification: <spec>{spec}</spec>. 
-        Here is the current code: <code>{code}</code>. 
-        And here is a review of the code: <review>{review}</review>. 
-        Improve the code based on the review, keep the specification in mind, and return the full updated code. 
-        Don't supply any reasoning, just code."""
-
-        updated_code = await Settings.llm.complete(prompt)
-        return Event(type=EventType.CODE, data={"code": updated_code.text})
+        updated_code = await self.complete(CODER_PROMPT.format(spec=spec, code=code, review=review))
+        return Event(type=EventType.CODE, data={"code": updated_code})
 
     async def reviewer(self, event: Event) -> Event:
         """Review code and provide feedback"""
-        spec = self.context.get("specification")
+        spec = self.context.get("specification", "")
         code = event.data["code"]
         
         num_reviews = self.context.get("numberReviews", 0) + 1
@@ -108,12 +307,15 @@ class AppCreatorAgent:
             data={"msg": f"Review #{num_reviews}: {truncate(code)}"}
         ))
 
-        prompt = f"""Review this code: <code>{code}</code>. 
-        Check if the code quality and whether it correctly implements this specification: <spec>{spec}</spec>. 
-        If you're satisfied, just return 'Looks great', nothing else. 
-        If not, return a review with a list of changes you'd like to see."""
-
-        review = (await Settings.llm.complete(prompt)).text
+        # Identical code against the same spec gets the same review, so never ask twice
+        key = review_key(spec, code)
+        review = self._reviews.get(key)
+        if review is None:
+            self.cache_stats.review_misses += 1
+            review = await self.complete(REVIEWER_PROMPT.format(spec=spec, code=code))
+            self._reviews[key] = review
+        else:
+            self.cache_stats.review_hits += 1
         
         if "Looks great" in review:
             self.context.write_event(Event(
@@ -124,17 +326,58 @@ class AppCreatorAgent:
 
         return Event(type=EventType.REVIEW, data={"review": review, "code": code})
 
-    async def run(self, specification: str) -> str:
-        """Run the full agent workflow"""
+    def resume(self, checkpoint: Checkpoint, specification: Optional[str] = None) -> Optional[Event]:
+        """Restore state from a checkpoint and return the event to continue from, if any.
+
+        Raises ValueError if specification differs from the one the checkpointed run was started with.
+        """
+        records = checkpoint.completed()
+        context = Context()
+        context.restore(records)
+        spec = context.get("specification", "")
+        if records and specification is not None and spec != specification:
+            raise ValueError(
+                f"Checkpoint {checkpoint.path} belongs to a run with a different specification; "
+                "use another run_id to start a new run"
+            )
+        self.context = context
+        steps = checkpoint.steps()
+        for step in steps:
+            if step.output.type == EventType.REVIEW:
+                self._reviews[review_key(spec, step.output.data["code"])] = step.output.data["review"]
+        if records:
+            checkpoint.append({"kind": "resume", "steps": len(steps)})
+        self.context.attach(checkpoint)
+        return steps[-1].output if steps else None
+
+    async def _step(self, handler, event: Event) -> Event:
+        started = time.perf_counter()
+        output = await handler(event)
+        self.step_durations.append((handler.__name__, time.perf_counter() - started))
+        if self.checkpoint is not None:
+            self.checkpoint.append({
+                "kind": "step",
+                "step": handler.__name__,
+                "input": event.to_dict(),
+                "output": output.to_dict(),
+            })
+        return output
+
+    async def run(self, specification: str, run_id: Optional[str] = None) -> str:
+        """Run the full agent workflow, resuming run_id from its checkpoint if one exists"""
         event = Event(type=EventType.START, data={"input": specification})
+        if self.checkpoint_dir is not None:
+            self.run_id = run_id or uuid.uuid4().hex
+            self.checkpoint = Checkpoint.for_run(self.checkpoint_dir, self.run_id)
+            event = self.resume(self.checkpoint, specification) or event
         
         while True:
             if event.type == EventType.START:
-                event = await self.architect(event)
+                event = await self._step(self.architect, event)
             elif event.type == EventType.REVIEW:
-                event = await self.coder(event)
+                event = await self._step(self.coder, event)
             elif event.type == EventType.CODE:
-                event = await self.reviewer(event)
+                event = await self._step(self.reviewer, event)
             elif event.type == EventType.PACKAGE:
                 return event.data["code"]
             elif event.type == EventType.STOP:
@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from agent import AppCreatorAgent
+from packager import packager
+
+SPEC_PATTERN = re.compile(r"<spec>(.*?)</spec>", re.DOTALL)
+
+def count_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token)"""
+    return max(1, math.ceil(len(text) / 4))
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "max": max(values) if values else 0.0,
+    }
+
+@dataclass
+class Completion:
+    text: str
+
+class FakeCompletionServer:
+    """Local stand-in for the completion server used by AppCreatorAgent.
+
+    Each completion takes `latency` seconds plus the generated tokens divided by
+    `tokens_per_second`. `slots` limits how many completions are generated at once,
+    like the parallel slots of a llama.cpp server. Reviews follow `verdicts` per
+    specification ("approve" or "changes"), repeating the last entry once exhausted.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        tokens_per_second: float = 200.0,
+        verdicts: Sequence[str] = ("changes", "changes", "approve"),
+        code_lines: int = 40,
+        slots: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.verdicts = list(verdicts)
+        self.code_lines = code_lines
+        self._slots = asyncio.Semaphore(slots) if slots else None
+        self._reviews: Dict[str, int] = {}
+        self._revisions: Dict[str, int] = {}
+        self.calls = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    def respond(self, prompt: str) -> str:
+        match = SPEC_PATTERN.search(prompt)
+        spec = match.group(1) if match else ""
+        if "Task: Review" in prompt:
+            number = self._reviews.get(spec, 0)
+            self._reviews[spec] = number + 1
+            verdict = self.verdicts[min(number, len(self.verdicts) - 1)]
+            if verdict == "approve":
+                return "Looks great"
+            return f"Review {number + 1}:\n- Add error handling to every route\n- Add tests"
+        revision = self._revisions.get(spec, 0)
+        self._revisions[spec] = revision + 1
+        body = "\n".join(f"    # revision {revision}, line {i}" for i in range(self.code_lines))
+        return f"```app.py\nfrom flask import Flask\n\napp = Flask(__name__)\n\ndef index():\n{body}\n    return 'ok'\n```"
+
+    async def complete(self, prompt: str) -> Completion:
+        text = self.respond(prompt)
+        tokens_out = count_tokens(text)
+        self.calls += 1
+        self.tokens_in += count_tokens(prompt)
+        self.tokens_out += tokens_out
+        delay = self.latency + tokens_out / self.tokens_per_second
+        if self._slots is None:
+            await asyncio.sleep(delay)
+        else:
+            async with self._slots:
+                await asyncio.sleep(delay)
+        return Completion(text=text)
+
+async def run_once(server: FakeCompletionServer, index: int, output_root: str) -> Dict[str, Any]:
+    """Run the full loop plus packaging once and return its timings"""
+    agent = AppCreatorAgent(llm=server)
+    started = time.perf_counter()
+    code = await agent.run(f"Benchmark app #{index}: a Flask app with a homepage and a /time route")
+    packaging_started = time.perf_counter()
+    await packager(code, output_dir=os.path.join(output_root, f"run-{index}"))
+    finished = time.perf_counter()
+    return {
+        "durations": agent.step_durations + [("packager", finished - packaging_started)],
+        "total": finished - started,
+    }
+
+async def benchmark(concurrency: int, runs: Optional[int] = None, **server_options) -> Dict[str, Any]:
+    """Run `runs` loops (default: `concurrency`) with at most `concurrency` in flight"""
+    server = FakeCompletionServer(**server_options)
+    runs = runs or concurrency
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index: int) -> Dict[str, Any]:
+        async with semaphore:
+            return await run_once(server, index, output_root)
+
+    with tempfile.TemporaryDirectory() as output_root:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(limited(i) for i in range(runs)))
+        wall = time.perf_counter() - started
+
+    stages: Dict[str, List[float]] = {}
+    for result in results:
+        for name, duration in result["durations"]:
+            stages.setdefault(name, []).append(duration)
+
+    return {
+        "concurrency": concurrency,
+        "runs": runs,
+        "wall_seconds": wall,
+        "runs_per_second": runs / wall if wall else 0.0,
+        "llm_calls": server.calls,
+        "tokens_in": server.tokens_in,
+        "tokens_out": server.tokens_out,
+        "tokens_out_per_second": server.tokens_out / wall if wall else 0.0,
+        "run_latency": summarize([result["total"] for result in results]),
+        "stages": {name: summarize(values) for name, values in stages.items()},
+    }
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\nConcurrency {report['concurrency']}: {report['runs']} runs in {report['wall_seconds']:.2f}s "
+          f"({report['runs_per_second']:.2f} runs/s)")
+    print(f"  LLM calls: {report['llm_calls']}, tokens in/out: {report['tokens_in']}/{report['tokens_out']} "
+          f"({report['tokens_out_per_second']:.0f} tokens out/s)")
+    latency = report["run_latency"]
+    print(f"  run latency: mean {latency['mean']:.3f}s p50 {latency['p50']:.3f}s p95 {latency['p95']:.3f}s")
+    for name, stats in report["stages"].items():
+        print(f"  {name:<10} n={stats['count']:<4} mean {stats['mean']:.3f}s "
+              f"p50 {stats['p50']:.3f}s p95 {stats['p95']:.3f}s max {stats['max']:.3f}s")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the architect -> review -> code loop offline")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Concurrent runs to measure.")
+    parser.add_argument("--runs", type=int, default=None, help="Runs per concurrency level (default: the level).")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fixed seconds per completion.")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Generated tokens per second.")
+    parser.add_argument("--verdicts", default="changes,changes,approve", help="Review verdict schedule per run.")
+    parser.add_argument("--code-lines", type=int, default=40, help="Lines of code per generated file.")
+    parser.add_argument("--slots", type=int, default=None, help="Completions the server generates at once.")
+    parser.add_argument("--json", default=None, help="Append one JSON report per concurrency level to this file.")
+    args = parser.parse_args()
+
+    for concurrency in args.concurrency:
+        report = await benchmark(
+            concurrency,
+            runs=args.runs,
+            latency=args.latency,
+            tokens_per_second=args.token_rate,
+            verdicts=args.verdicts.split(","),
+            code_lines=args.code_lines,
+            slots=args.slots,
+        )
+        print_report(report)
+        if args.json:
+            with open(args.json, "a") as f:
+                f.write(json.dumps(report) + "\n")
+
+if __name__ == "__main__":
+    asyncio.run(main())
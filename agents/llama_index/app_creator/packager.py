@@ -34,10 +34,9 @@ def extract_files(code: str) -> Dict[str, str]:
             
     return files
 
-async def packager(code: str) -> Event:
+async def packager(code: str, output_dir: str = "output") -> Event:
     """Package the code into individual files"""
     # Create output directory if it doesn't exist
-    output_dir = "output"
     os.makedirs(output_dir, exist_ok=True)
     
     # Extract files from the code block
@@ -0,0 +1,19 @@
+import argparse
+from agent import Checkpoint, truncate
+
+def replay(path: str) -> None:
+    """Print the completed steps of a checkpointed run without calling the LLM"""
+    steps = Checkpoint(path).steps()
+    for number, step in enumerate(steps, start=1):
+        print(f"Step {number}: {step.name} ({step.input.type.value} -> {step.output.type.value})")
+        for event in step.events:
+            print(f"  {event.data.get('msg', event.data)}")
+        for key, value in step.output.data.items():
+            print(f"  {key}: {truncate(str(value))}")
+    print(f"{len(steps)} completed steps")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a checkpointed AppCreatorAgent run")
+    parser.add_argument("checkpoint", help="Path to a checkpoints/<run_id>.jsonl file")
+    args = parser.parse_args()
+    replay(args.checkpoint)
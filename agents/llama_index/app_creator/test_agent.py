@@ -1,5 +1,6 @@
 import pytest
 import asyncio
+from types import SimpleNamespace
 from agent import AppCreatorAgent, Event, EventType
 from unittest.mock import AsyncMock, patch
 
@@ -28,5 +29,103 @@ async def test_reviewer():
         assert result.type == EventType.PACKAGE
         assert "flask" in result.data["code"].lower()
 
+@pytest.mark.asyncio
+async def test_reviewer_memoizes_identical_code():
+    agent = AppCreatorAgent(model_path="http://localhost:1234/v1")
+    agent.context.set("specification", "Create a hello world Flask app")
+    event = Event(type=EventType.CODE, data={"code": "from flask import Flask"})
+    
+    with patch('llama_index.core.Settings.llm.complete', new_callable=AsyncMock) as mock_complete:
+        mock_complete.return_value.text = "Add a route for /"
+        first = await agent.reviewer(event)
+        second = await agent.reviewer(event)
+        
+        assert mock_complete.await_count == 1
+        assert first.data["review"] == second.data["review"]
+        assert agent.cache_stats.review_hits == 1
+        assert agent.cache_stats.review_misses == 1
+
+@pytest.mark.asyncio
+async def test_prompts_share_spec_prefix():
+    agent = AppCreatorAgent(model_path="http://localhost:1234/v1")
+    
+    with patch('llama_index.core.Settings.llm.complete', new_callable=AsyncMock) as mock_complete:
+        mock_complete.return_value.text = "from flask import Flask"
+        code_event = await agent.architect(Event(type=EventType.START, data={"input": "Create a hello world Flask app"}))
+        await agent.reviewer(code_event)
+        
+        architect_prompt, reviewer_prompt = [c.args[0] for c in mock_complete.await_args_list]
+        assert "<spec>Create a hello world Flask app</spec>" in architect_prompt.split("Task:")[0]
+        assert architect_prompt.split("Task:")[0] == reviewer_prompt.split("Task:")[0]
+        assert agent.cache_stats.prefix_chars_reused >= len(architect_prompt.split("Task:")[0])
+
+@pytest.mark.asyncio
+async def test_server_reported_cached_tokens():
+    agent = AppCreatorAgent(model_path="http://localhost:1234/v1")
+    
+    with patch('llama_index.core.Settings.llm.complete', new_callable=AsyncMock) as mock_complete:
+        mock_complete.side_effect = [
+            SimpleNamespace(text="a", raw={"usage": {"prompt_tokens_details": {"cached_tokens": 120}}}),
+            SimpleNamespace(text="b", raw={"tokens_cached": 80}),
+            SimpleNamespace(text="c"),
+        ]
+        for prompt in ("one", "two", "three"):
+            await agent.complete(prompt)
+    
+    assert agent.cache_stats.server_cached_tokens == 200
+    assert agent.cache_stats.server_reports == 2
+
+@pytest.mark.asyncio
+async def test_run_resumes_from_checkpoint(tmp_path):
+    spec = "Create a hello world Flask app"
+    
+    agent = AppCreatorAgent(model_path="http://localhost:1234/v1", checkpoint_dir=str(tmp_path))
+    with patch('llama_index.core.Settings.llm.complete', new_callable=AsyncMock) as mock_complete:
+        # architect, review #1, coder, then the second review crashes
+        mock_complete.side_effect = [
+            SimpleNamespace(text="v1"),
+            SimpleNamespace(text="Add a route for /"),
+            SimpleNamespace(text="v2"),
+            RuntimeError("server went away"),
+        ]
+        with pytest.raises(RuntimeError):
+            await agent.run(spec, run_id="crashed")
+    
+    resumed = AppCreatorAgent(model_path="http://localhost:1234/v1", checkpoint_dir=str(tmp_path))
+    with patch('llama_index.core.Settings.llm.complete', new_callable=AsyncMock) as mock_complete:
+        mock_complete.return_value.text = "Looks great"
+        result = await resumed.run(spec, run_id="crashed")
+        
+        assert result == "v2"
+        assert mock_complete.await_count == 1
+        assert resumed.context.get("numberReviews") == 2
+    
+    steps = resumed.checkpoint.steps()
+    assert [step.name for step in steps] == ["architect", "reviewer", "coder", "reviewer"]
+    assert steps[-1].output.type == EventType.PACKAGE
+
+@pytest.mark.asyncio
+async def test_run_rejects_checkpoint_of_other_specification(tmp_path):
+    agent = AppCreatorAgent(model_path="http://localhost:1234/v1", checkpoint_dir=str(tmp_path))
+    with patch('llama_index.core.Settings.llm.complete', new_callable=AsyncMock) as mock_complete:
+        mock_complete.return_value.text = "Looks great"
+        await agent.run("Create a hello world Flask app", run_id="app")
+        
+        other = AppCreatorAgent(model_path="http://localhost:1234/v1", checkpoint_dir=str(tmp_path))
+        with pytest.raises(ValueError):
+            await other.run("Create a todo list CLI", run_id="app")
+
+@pytest.mark.asyncio
+async def test_benchmark_runs_full_loop():
+    from benchmark import benchmark
+    
+    report = await benchmark(2, runs=4, latency=0, tokens_per_second=1e9, verdicts=["changes", "approve"])
+    
+    # architect, review, coder, review for each run
+    assert report["llm_calls"] == 16
+    assert report["stages"]["reviewer"]["count"] == 8
+    assert report["stages"]["packager"]["count"] == 4
+    assert report["tokens_in"] > 0 and report["tokens_out"] > 0
+
 if __name__ == "__main__":
     asyncio.run(pytest.main([__file__]))
@@ -0,0 +1,90 @@
+import base64
+import hashlib
+import io
+import os
+from collections import OrderedDict
+
+from llama_index.core.schema import ImageDocument
+from PIL import Image
+
+
+IMAGE_CACHE_DIR = os.path.join(".cache", "images")
+MAX_SIDE = 1024
+JPEG_QUALITY = 85
+
+
+class ImageCache:
+    """Downscaled, base64-encoded images cached in memory and on disk by content hash.
+
+    The payload is computed once per image content and settings: later
+    requests for the same file (or a copy of it) skip decoding, resizing and
+    encoding. ImageDocuments built from it carry the payload, so the
+    multi-modal LLM sends it as is instead of re-reading the file each step.
+    """
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, max_side=MAX_SIDE, quality=JPEG_QUALITY, max_memory_items=64):
+        self.cache_dir = cache_dir
+        self.max_side = max_side
+        self.quality = quality
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        # (path, mtime, size) -> content key, so unchanged files are not re-hashed
+        self._keys = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, path):
+        stat = os.stat(path)
+        signature = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        if signature not in self._keys:
+            digest = hashlib.sha256(f"{self.max_side}:{self.quality}:".encode("utf-8"))
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    digest.update(block)
+            self._keys[signature] = digest.hexdigest()[:32]
+        return self._keys[signature]
+
+    def preprocess(self, path):
+        """Downscale so the longer side is at most max_side and re-encode; returns (bytes, mimetype)"""
+        with Image.open(path) as image:
+            image.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+            output = io.BytesIO()
+            has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+            if has_alpha:
+                # JPEG would drop the transparency
+                image.save(output, format="PNG", optimize=True)
+                return output.getvalue(), "image/png"
+            image.convert("RGB").save(output, format="JPEG", quality=self.quality, optimize=True)
+            return output.getvalue(), "image/jpeg"
+
+    def encode(self, path):
+        """Base64 payload and mimetype of the preprocessed image at path"""
+        key = self.key(path)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+
+        cache_path = os.path.join(self.cache_dir, key)
+        if os.path.exists(cache_path):
+            with open(cache_path, "r") as file:
+                mimetype, payload = file.read().split("\n", 1)
+            self.disk_hits += 1
+        else:
+            data, mimetype = self.preprocess(path)
+            payload = base64.b64encode(data).decode("ascii")
+            with open(cache_path + ".tmp", "w") as file:
+                file.write(f"{mimetype}\n{payload}")
+            os.replace(cache_path + ".tmp", cache_path)
+            self.misses += 1
+
+        self._memory[key] = (payload, mimetype)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+        return payload, mimetype
+
+    def image_document(self, path):
+        payload, mimetype = self.encode(path)
+        return ImageDocument(image=payload, image_mimetype=mimetype, metadata={"file_path": path})
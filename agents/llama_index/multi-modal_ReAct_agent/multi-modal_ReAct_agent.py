@@ -1,40 +1,60 @@
+import argparse
+import asyncio
 import os
-from llama_index.readers.web import SimpleWebPageReader
-from llama_index.core import VectorStoreIndex, Settings
+from llama_index.core import Settings
 from llama_index.core.tools import QueryEngineTool, ToolMetadata
 from llama_index.core.agent.react_multimodal.step import MultimodalReActAgentWorker
-from llama_index.core.agent import Task, AgentRunner
-from llama_index.core.schema import ImageDocument
 from llama_index.llms.openai import OpenAI
 from llama_index.multi_modal_llms.openai import OpenAIMultiModal
 
+from image_cache import ImageCache
+from rag_cache import download, load_or_build_index, load_source_documents
+from step_runner import StepRunner, TimedTool
+
+IMAGE_URL = "https://images.openai.com/blob/a2e49de2-ba5b-4869-9c2d-db3b4b5dcc19/new-models-and-developer-products-announced-at-devday.jpg?width=2000"
+SOURCE_URL = "https://openai.com/blog/new-models-and-developer-products-announced-at-devday"
+
+parser = argparse.ArgumentParser(description="Multi-modal ReAct agent over a web page and an image")
+parser.add_argument("--source", default=SOURCE_URL, help="URL or local file (.html, .txt, .pdf, ...) to index.")
+parser.add_argument("--image", default=IMAGE_URL, help="URL or local path of the image to analyze.")
+parser.add_argument("--storage-dir", default=os.path.join("storage", "devday"), help="Where the index is persisted.")
+parser.add_argument("--max-image-side", type=int, default=1024, help="Longer image side after downscaling, in pixels.")
+parser.add_argument("--question", action="append", help="Question about the image; repeat to ask several in parallel.")
+parser.add_argument("--max-steps", type=int, default=10, help="Step budget of each task.")
+parser.add_argument("--max-seconds", type=float, default=300, help="Wall-clock budget of each task.")
+parser.add_argument("--concurrency", type=int, default=4, help="Tasks running at the same time.")
+args = parser.parse_args()
+
 # Set up LM Studio API endpoint
 LM_STUDIO_API_BASE = "http://localhost:1234/v1"
 os.environ["OPENAI_API_KEY"] = "lm-studio"
 os.environ["OPENAI_API_BASE"] = LM_STUDIO_API_BASE
 
 # Download the image for analysis
-!wget "https://images.openai.com/blob/a2e49de2-ba5b-4869-9c2d-db3b4b5dcc19/new-models-and-developer-products-announced-at-devday.jpg?width=2000" -O dev_day.png
+# Pages and images are cached on disk and revalidated with ETag/Last-Modified
+image_path = args.image
+if image_path.startswith(("http://", "https://")):
+    image_path = download(image_path, "dev_day.png")
 
-# Fetch web content for RAG
-url = "https://openai.com/blog/new-models-and-developer-products-announced-at-devday"
-reader = SimpleWebPageReader(html_to_text=True)
-documents = reader.load_data(urls=[url])
+# Fetch web content for RAG (or read a local file to run offline)
+documents = load_source_documents(args.source)
 
 # Set up LLM using LM Studio
 Settings.llm = OpenAI(temperature=0, model="TheBloke/Mistral-7B-Instruct-v0.1-GGUF")
 
 # Create vector index
-vector_index = VectorStoreIndex.from_documents(documents)
+# Reloaded from storage when the source content is unchanged
+vector_index = load_or_build_index(documents, args.storage_dir)
 
 # Create query tool
-query_tool = QueryEngineTool(
+# TimedTool records each call on the timeline of the task that made it
+query_tool = TimedTool(QueryEngineTool(
     query_engine=vector_index.as_query_engine(),
     metadata=ToolMetadata(
         name="vector_tool",
         description="Useful to lookup new features announced by OpenAI"
     )
-)
+))
 
 # Set up multi-modal LLM using LM Studio
 # Note: LM Studio might not support multi-modal models, so we'll use a text-only model here
@@ -48,35 +68,26 @@ react_step_engine = MultimodalReActAgentWorker.from_tools(
 )
 agent = react_step_engine.as_agent()
 
-# Define query and create task
+# Define queries and create tasks
 query_str = (
     "The photo shows some new features released by OpenAI. "
     "Can you pinpoint the features in the photo and give more details using relevant tools?"
 )
-image_document = ImageDocument(image_path="dev_day.png")
-task = agent.create_task(
-    query_str,
-    extra_state={"image_docs": [image_document]}
-)
-
-# Define execution functions
-def execute_step(agent: AgentRunner, task: Task):
-    step_output = agent.run_step(task.task_id)
-    if step_output.is_last:
-        response = agent.finalize_response(task.task_id)
-        print(f"> Agent finished: {str(response)}")
-        return response
-    else:
-        return None
-
-def execute_steps(agent: AgentRunner, task: Task):
-    response = execute_step(agent, task)
-    while response is None:
-        response = execute_step(agent, task)
-    return response
+# Downscaled and base64-encoded once, then reused from the cache by every step and task
+image_cache = ImageCache(max_side=args.max_image_side)
+image_document = image_cache.image_document(image_path)
+tasks = [
+    agent.create_task(question, extra_state={"image_docs": [image_document]})
+    for question in args.question or [query_str]
+]
 
 # Run the agent
-response = execute_steps(agent, task)
+# Tasks advance concurrently, each within its step and wall-clock budget
+runner = StepRunner(agent, max_steps=args.max_steps, max_seconds=args.max_seconds, max_concurrency=args.concurrency)
+results = asyncio.run(runner.run_all(tasks))
 
-# Print the final response
-print(str(response))
+# Print the final responses and where the time went
+for response, timeline in results:
+    print(f"> {timeline.input}")
+    print(str(response) if response is not None else f"No answer ({timeline.status})")
+    print(timeline.report())
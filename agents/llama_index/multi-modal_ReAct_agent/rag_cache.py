@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import time
+
+import html2text
+import requests
+from llama_index.core import Document, SimpleDirectoryReader, StorageContext, VectorStoreIndex, load_index_from_storage
+
+
+PAGE_CACHE_DIR = os.path.join(".cache", "pages")
+# Bump to rebuild persisted indexes after changing how documents are indexed
+INDEX_VERSION = "1"
+# Seconds a cached page is used without asking the server whether it changed
+MAX_AGE = 3600
+
+
+def _cache_paths(url, cache_dir):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(cache_dir, key + ".body"), os.path.join(cache_dir, key + ".json")
+
+
+def _write_atomic(path, data):
+    with open(path + ".tmp", "wb") as file:
+        file.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def fetch_cached(url, cache_dir=PAGE_CACHE_DIR, max_age=MAX_AGE, timeout=30):
+    """Return the body of url, cached on disk and revalidated with ETag/Last-Modified.
+
+    A cached copy younger than max_age seconds is used without a request; an
+    older one is revalidated, and used as is if the server cannot be reached.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    meta = None
+    if os.path.exists(body_path) and os.path.exists(meta_path):
+        with open(meta_path, "r") as file:
+            meta = json.load(file)
+        if time.time() - meta["checked_at"] < max_age:
+            with open(body_path, "rb") as file:
+                return file.read()
+
+    headers = {}
+    if meta and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+    except requests.RequestException as e:
+        if meta is None:
+            raise
+        print(f"Could not revalidate {url} ({e}), using the cached copy")
+        with open(body_path, "rb") as file:
+            return file.read()
+
+    if response.status_code == 304:
+        with open(body_path, "rb") as file:
+            body = file.read()
+    else:
+        body = response.content
+        _write_atomic(body_path, body)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+    meta["checked_at"] = time.time()
+    _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+    return body
+
+
+def download(url, path, **kwargs):
+    """Save url to path through the page cache, rewriting path only if the content changed"""
+    body = fetch_cached(url, **kwargs)
+    if os.path.exists(path):
+        with open(path, "rb") as file:
+            if file.read() == body:
+                return path
+    _write_atomic(path, body)
+    return path
+
+
+def html_to_text(html):
+    return html2text.HTML2Text().handle(html)
+
+
+def load_source_documents(source, **kwargs):
+    """Documents from a URL (through the page cache) or a local file, for offline runs"""
+    if source.startswith(("http://", "https://")):
+        html = fetch_cached(source, **kwargs).decode("utf-8", errors="replace")
+        return [Document(text=html_to_text(html), id_=source, metadata={"url": source})]
+    if source.lower().endswith((".html", ".htm")):
+        with open(source, "r", encoding="utf-8", errors="replace") as file:
+            return [Document(text=html_to_text(file.read()), id_=source, metadata={"file_path": source})]
+    return SimpleDirectoryReader(input_files=[source]).load_data()
+
+
+def documents_hash(documents):
+    digest = hashlib.sha256(INDEX_VERSION.encode("utf-8"))
+    for document in documents:
+        digest.update(document.get_content().encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def load_or_build_index(documents, persist_dir):
+    """Load the index persisted in persist_dir if it was built from the same content, else build and persist it"""
+    source_hash = documents_hash(documents)
+    hash_path = os.path.join(persist_dir, "source_hash")
+    if os.path.exists(hash_path):
+        with open(hash_path, "r") as file:
+            if file.read().strip() == source_hash:
+                return load_index_from_storage(StorageContext.from_defaults(persist_dir=persist_dir))
+
+    index = VectorStoreIndex.from_documents(documents)
+    index.storage_context.persist(persist_dir=persist_dir)
+    # Written last, so an interrupted persist is rebuilt next time
+    with open(hash_path, "w") as file:
+        file.write(source_hash)
+    return index
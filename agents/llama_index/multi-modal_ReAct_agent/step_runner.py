@@ -0,0 +1,154 @@
+import asyncio
+import contextvars
+import time
+
+from llama_index.core.agent import AgentRunner, Task
+from llama_index.core.tools.types import AsyncBaseTool
+
+# Timeline of the task running in the current asyncio task, for TimedTool
+current_timeline = contextvars.ContextVar("current_timeline", default=None)
+
+
+class TaskTimeline:
+    """Steps and tool calls of one task with their start offsets and durations"""
+
+    def __init__(self, task: Task):
+        self.task_id = task.task_id
+        self.input = task.input
+        self.started = time.perf_counter()
+        self.finished = None
+        self.status = "running"
+        self.error = None
+        self.events = []
+
+    def record(self, kind, name, started, **details):
+        self.events.append({
+            "kind": kind,
+            "name": name,
+            "start": started - self.started,
+            "duration": time.perf_counter() - started,
+            **details,
+        })
+
+    def finish(self, status, error=None):
+        self.finished = time.perf_counter()
+        self.status = status
+        self.error = error
+
+    @property
+    def duration(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def as_dict(self):
+        return {
+            "task_id": self.task_id,
+            "input": self.input,
+            "status": self.status,
+            "error": self.error,
+            "duration": self.duration,
+            "steps": sum(event["kind"] == "step" for event in self.events),
+            "tool_seconds": sum(event["duration"] for event in self.events if event["kind"] == "tool"),
+            "events": self.events,
+        }
+
+    def report(self):
+        lines = [f"Task {self.task_id}: {self.status} in {self.duration:.2f}s"]
+        # Events are recorded when they end; list them by start, each step above its tool calls
+        for event in sorted(self.events, key=lambda event: (event["start"], event["kind"] == "tool")):
+            indent = "    " if event["kind"] == "tool" else "  "
+            lines.append(f"{indent}{event['start']:7.2f}s  {event['duration']:6.2f}s  {event['kind']} {event['name']}")
+        if self.error:
+            lines.append(f"  error: {self.error}")
+        return "\n".join(lines)
+
+
+class TimedTool(AsyncBaseTool):
+    """Wraps a tool so each call is recorded on the timeline of the task that made it"""
+
+    def __init__(self, tool):
+        self.tool = tool
+
+    @property
+    def metadata(self):
+        return self.tool.metadata
+
+    def _record(self, started, error=None):
+        timeline = current_timeline.get()
+        if timeline is not None:
+            timeline.record("tool", self.metadata.name, started, error=error)
+
+    def call(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            output = self.tool(*args, **kwargs)
+        except Exception as e:
+            self._record(started, str(e))
+            raise
+        self._record(started)
+        return output
+
+    async def acall(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            if hasattr(self.tool, "acall"):
+                output = await self.tool.acall(*args, **kwargs)
+            else:
+                output = await asyncio.to_thread(self.tool, *args, **kwargs)
+        except Exception as e:
+            self._record(started, str(e))
+            raise
+        self._record(started)
+        return output
+
+
+class StepRunner:
+    """Advances agent tasks step by step with asyncio, many tasks at once.
+
+    Each task stops after max_steps steps or max_seconds of wall-clock time,
+    whichever comes first; at most max_concurrency tasks run at the same time.
+    """
+
+    def __init__(self, agent: AgentRunner, max_steps: int = 10, max_seconds: float = 300, max_concurrency: int = 4):
+        self.agent = agent
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.max_concurrency = max_concurrency
+
+    async def run_task(self, task: Task):
+        """Run task to completion within its budgets; returns (response or None, TaskTimeline)"""
+        timeline = TaskTimeline(task)
+        current_timeline.set(timeline)
+        deadline = time.monotonic() + self.max_seconds
+        try:
+            for step in range(1, self.max_steps + 1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timeline.finish("time_limit")
+                    return None, timeline
+                started = time.perf_counter()
+                step_output = await asyncio.wait_for(self.agent.arun_step(task.task_id), remaining)
+                timeline.record("step", str(step), started, is_last=step_output.is_last)
+                if step_output.is_last:
+                    started = time.perf_counter()
+                    response = self.agent.finalize_response(task.task_id)
+                    timeline.record("finalize", "response", started)
+                    timeline.finish("done")
+                    return response, timeline
+            timeline.finish("step_limit")
+            return None, timeline
+        except asyncio.TimeoutError:
+            timeline.finish("time_limit")
+            return None, timeline
+        except Exception as e:
+            timeline.finish("error", str(e))
+            return None, timeline
+
+    async def run_all(self, tasks):
+        """Run tasks concurrently; returns [(response or None, TaskTimeline)] in the order given"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(task):
+            async with semaphore:
+                return await self.run_task(task)
+
+        return await asyncio.gather(*(run(task) for task in tasks))
@@ -0,0 +1,67 @@
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+class ChatHistory:
+    """Append-only chat history with message ids, bounded to token_limit tokens.
+
+    Every appended message gets an increasing "id", which is also written
+    back onto the dict that was passed in. Messages that already carry an id
+    this history has seen are skipped, so re-appending the same message dicts
+    (a retried turn, or the result of get()) is a no-op. Once the messages exceed token_limit the
+    oldest are dropped; token counts are computed once per message, so an
+    append costs the same however long the conversation has run.
+    """
+
+    def __init__(self, token_limit: int = 3000, messages: Iterable[Dict] = (),
+                 count_tokens: Callable[[str], int] = estimate_tokens):
+        self.token_limit = token_limit
+        self.count_tokens = count_tokens
+        self._messages = deque()
+        self._tokens = 0
+        self.next_id = 0
+        self.trimmed = 0
+        self.append(messages)
+
+    def append(self, messages: Iterable[Dict]) -> List[int]:
+        """Add new messages; returns the ids of the ones that were added"""
+        added = []
+        for message in messages:
+            if message.get("id") is not None:
+                if message["id"] < self.next_id:
+                    continue
+                self.next_id = message["id"]
+            message["id"] = self.next_id
+            message = dict(message)
+            self.next_id += 1
+            tokens = self.count_tokens(message.get("content") or "")
+            self._messages.append((message, tokens))
+            self._tokens += tokens
+            added.append(message["id"])
+        # Always keep the latest message, even if it alone is over the limit
+        while self._tokens > self.token_limit and len(self._messages) > 1:
+            _, tokens = self._messages.popleft()
+            self._tokens -= tokens
+            self.trimmed += 1
+        return added
+
+    def get(self, since: Optional[int] = None) -> List[Dict]:
+        """Messages within the token limit, or only those with an id after since"""
+        if since is None:
+            return [message for message, _ in self._messages]
+        return [message for message, _ in self._messages if message["id"] > since]
+
+    @property
+    def last_id(self) -> Optional[int]:
+        return self._messages[-1][0]["id"] if self._messages else None
+
+    @property
+    def token_count(self) -> int:
+        return self._tokens
+
+    def __len__(self) -> int:
+        return len(self._messages)
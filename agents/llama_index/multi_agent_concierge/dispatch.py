@@ -0,0 +1,176 @@
+import asyncio
+import copy
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+WORD = re.compile(r"[a-z]+")
+
+
+def keyword_router(user_msg: str, agent_configs: List[Any]) -> List[Tuple[Any, float]]:
+    """Score agents by word overlap with their name and description; scores sum to 1, best first"""
+    if not agent_configs:
+        return []
+    words = set(WORD.findall(user_msg.lower()))
+    raw = []
+    for config in agent_configs:
+        vocabulary = set(WORD.findall(f"{config.name} {config.description}".lower())) - {"agent", "and", "the"}
+        raw.append((config, len(words & vocabulary)))
+    total = sum(score for _, score in raw)
+    if total == 0:
+        return [(config, 1 / len(raw)) for config, _ in raw]
+    return sorted(((config, score / total) for config, score in raw), key=lambda item: item[1], reverse=True)
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class DispatchMetrics:
+    """How much speculative dispatch costs (agent time that did not produce the answer) and saves (latency)"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.turns = 0
+        self.speculative_turns = 0
+        self.agents_started = 0
+        self.agents_cancelled = 0
+        self.agents_rejected = 0
+        self.fallbacks = 0
+        self.useful_seconds = 0.0
+        self.wasted_seconds = 0.0
+        self.latencies: List[float] = []
+
+    def record_latency(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+        if len(self.latencies) > self.window:
+            del self.latencies[: len(self.latencies) - self.window]
+
+    def as_dict(self) -> Dict[str, Any]:
+        spent = self.useful_seconds + self.wasted_seconds
+        return {
+            "turns": self.turns,
+            "speculative_turns": self.speculative_turns,
+            "agents_started": self.agents_started,
+            "agents_cancelled": self.agents_cancelled,
+            "agents_rejected": self.agents_rejected,
+            "fallbacks": self.fallbacks,
+            "wasted_seconds": self.wasted_seconds,
+            "wasted_fraction": self.wasted_seconds / spent if spent else 0.0,
+            "latency_p50": percentile(self.latencies, 0.5),
+            "latency_p95": percentile(self.latencies, 0.95),
+        }
+
+
+class SpeculativeDispatcher:
+    """Runs the routed agent, or the top_k candidates at once when the router is unsure.
+
+    When the best two router scores are within confidence_margin, up to top_k
+    agents whose config has speculative=True (read-only agents) run concurrently, each on its own copy of the session state. The
+    first answer that accept() approves wins: the others are cancelled and the
+    winner's state is copied back. If no candidate gives an acceptable answer,
+    the remaining agents are tried one by one in score order.
+
+    agent_runner(config, user_msg, llm, chat_history, state) returns the agent's answer.
+    """
+
+    def __init__(self, agent_runner: Callable[..., Awaitable[str]], router: Callable = keyword_router,
+                 top_k: int = 2, confidence_margin: float = 0.2,
+                 accept: Callable[[str], bool] = lambda response: bool(response and response.strip()),
+                 metrics: DispatchMetrics = None):
+        self.agent_runner = agent_runner
+        self.router = router
+        self.top_k = top_k
+        self.confidence_margin = confidence_margin
+        self.accept = accept
+        self.metrics = metrics or DispatchMetrics()
+
+    def candidates(self, ranked: List[Tuple[Any, float]]) -> List[Any]:
+        """Agents to start at once; agents with side effects only ever run alone"""
+        best = ranked[0][0]
+        if (len(ranked) == 1 or ranked[0][1] - ranked[1][1] >= self.confidence_margin
+                or not getattr(best, "speculative", False)):
+            return [best]
+        return [best] + [config for config, _ in ranked[1: self.top_k] if getattr(config, "speculative", False)]
+
+    async def _attempt(self, config, user_msg, llm, chat_history, state):
+        started = time.perf_counter()
+        try:
+            response = await self.agent_runner(config, user_msg, llm, chat_history, state)
+            return response, time.perf_counter() - started
+        except asyncio.CancelledError:
+            self.metrics.agents_cancelled += 1
+            self.metrics.wasted_seconds += time.perf_counter() - started
+            raise
+        except Exception as e:
+            print(f"{config.name} failed: {e}")
+            return None, time.perf_counter() - started
+
+    async def _race(self, configs, user_msg, llm, chat_history, state, timeout):
+        """Run configs concurrently; returns (config, response, state) of the first acceptable answer or None"""
+        states = {config.name: copy.deepcopy(state) for config in configs}
+        tasks = {
+            asyncio.ensure_future(self._attempt(config, user_msg, llm, chat_history, states[config.name])): config
+            for config in configs
+        }
+        self.metrics.agents_started += len(tasks)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    return None
+                for task in done:
+                    config = tasks[task]
+                    response, seconds = task.result()
+                    if response is not None and self.accept(response):
+                        self.metrics.useful_seconds += seconds
+                        return config, response, states[config.name]
+                    self.metrics.agents_rejected += 1
+                    self.metrics.wasted_seconds += seconds
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def dispatch(self, user_msg: str, agent_configs: List[Any], llm: Any, chat_history: List[Dict[str, Any]],
+                       state: Dict[str, Any], timeout: float = None) -> Tuple[Optional[Any], Optional[str]]:
+        """Return (winning config, response), or (None, None) if no agent answered acceptably.
+
+        timeout bounds each round: the speculative race and every fallback attempt.
+        """
+        started = time.perf_counter()
+        ranked = self.router(user_msg, agent_configs)
+        self.metrics.turns += 1
+        if not ranked:
+            self.metrics.record_latency(time.perf_counter() - started)
+            return None, None
+        candidates = self.candidates(ranked)
+        if len(candidates) > 1:
+            self.metrics.speculative_turns += 1
+        try:
+            winner = await self._race(candidates, user_msg, llm, chat_history, state, timeout)
+            if winner is None:
+                # Re-route: try the remaining agents in score order
+                for config, _ in ranked:
+                    if config in candidates:
+                        continue
+                    self.metrics.fallbacks += 1
+                    winner = await self._race([config], user_msg, llm, chat_history, state, timeout)
+                    if winner is not None:
+                        break
+            if winner is None:
+                return None, None
+            config, response, winner_state = winner
+            state.clear()
+            state.update(winner_state)
+            return config, response
+        finally:
+            self.metrics.record_latency(time.perf_counter() - started)
@@ -1,20 +1,43 @@
 import asyncio
 from typing import List, Dict, Any
-from llama_index.core.memory import ChatMemoryBuffer
-from llama_index.core.tools import BaseTool
+from llama_index.core.tools import BaseTool, FunctionTool
 from llama_index.llms.openai import OpenAI
 from llama_index.core.workflow import Context
 
+from chat_history import ChatHistory
+from dispatch import SpeculativeDispatcher, keyword_router
+from tool_cache import CachedLookup
+
 class AgentConfig:
-    def __init__(self, name: str, description: str, system_prompt: str, tools: List[BaseTool]):
+    def __init__(self, name: str, description: str, system_prompt: str, tools: List[BaseTool], speculative: bool = False):
         self.name = name
         self.description = description
         self.system_prompt = system_prompt
         self.tools = tools
+        # Safe to run and then discard: only read-only agents may be started speculatively
+        self.speculative = speculative
+
+async def simulated_agent(config: AgentConfig, user_msg: str, llm: Any, chat_history: List[Dict[str, str]], state: Dict[str, Any]) -> str:
+    # Simulate agent response
+    return f"Thank you for your message. I've processed it using our available agents. How can I assist you further?"
 
 class ConciergeAgent:
-    def __init__(self, timeout: int = None):
+    """Routes each message to a sub-agent through a SpeculativeDispatcher.
+
+    When the router cannot tell the best agents apart (scores within
+    confidence_margin), the top_k of them run concurrently and the first
+    acceptable answer wins; see self.metrics for the wasted work this costs.
+    """
+
+    def __init__(self, timeout: int = None, agent_runner=None, router=keyword_router, top_k: int = 2,
+                 confidence_margin: float = 0.2):
         self.timeout = timeout
+        self.dispatcher = SpeculativeDispatcher(agent_runner or simulated_agent, router=router, top_k=top_k,
+                                                confidence_margin=confidence_margin)
+
+    @property
+    def metrics(self):
+        return self.dispatcher.metrics
 
     async def run(self, user_msg: str, agent_configs: List[AgentConfig], llm: Any, chat_history: List[Dict[str, str]], initial_state: Dict[str, Any]):
         # Simplified implementation
@@ -22,35 +45,58 @@ class ConciergeAgent:
         print("Available agents:")
         for agent in agent_configs:
             print(f"- {agent.name}: {agent.description}")
-        
-        # Simulate agent response
-        response = f"Thank you for your message. I've processed it using our available agents. How can I assist you further?"
-        
-        return {"response": response, "chat_history": chat_history + [{"role": "user", "content": user_msg}, {"role": "assistant", "content": response}]}
 
-def get_stock_lookup_tools() -> List[BaseTool]:
-    # Simplified implementation
-    return []
+        agent, response = await self.dispatcher.dispatch(user_msg, agent_configs, llm, chat_history, initial_state, self.timeout)
+        if response is None:
+            response = "Sorry, I couldn't handle that request right now. Please try again."
+
+        # Only this turn's messages; the caller appends them to its history
+        return {"response": response, "agent": agent.name if agent else None, "new_messages": [{"role": "user", "content": user_msg}, {"role": "assistant", "content": response}]}
+
+def get_stock_lookup_tools(backend=None, ttl: float = 5.0) -> List[BaseTool]:
+    """backend.fetch(symbols) -> {symbol: price}; prices are cached for ttl seconds and batched across sessions"""
+    if backend is None:
+        # Simplified implementation
+        return []
+    prices = CachedLookup("stock_price", backend.fetch, ttl=ttl)
+
+    async def lookup_stock_price(symbol: str) -> str:
+        """Look up the latest price of a stock symbol."""
+        symbol = symbol.strip().upper()
+        return f"{symbol}: {await prices.get(symbol)}"
+
+    return [FunctionTool.from_defaults(async_fn=lookup_stock_price)]
 
 def get_authentication_tools() -> List[BaseTool]:
     # Simplified implementation
     return []
 
-def get_account_balance_tools() -> List[BaseTool]:
-    # Simplified implementation
-    return []
+def get_account_balance_tools(backend=None, ttl: float = 2.0) -> List[BaseTool]:
+    """backend.fetch(account_ids) -> {account_id: balance}, cached for ttl seconds like stock prices"""
+    if backend is None:
+        # Simplified implementation
+        return []
+    balances = CachedLookup("account_balance", backend.fetch, ttl=ttl)
+
+    async def get_account_balance(account_id: str) -> str:
+        """Get the current balance of an account."""
+        return f"Balance of {account_id}: {await balances.get(account_id)}"
+
+    return [FunctionTool.from_defaults(async_fn=get_account_balance)]
 
 def get_transfer_money_tools() -> List[BaseTool]:
     # Simplified implementation
     return []
 
-def get_agent_configs() -> List[AgentConfig]:
+def get_agent_configs(market_data=None, accounts=None) -> List[AgentConfig]:
+    """market_data and accounts are the backends behind the stock and balance tools"""
     return [
         AgentConfig(
             name="Stock Lookup Agent",
             description="Looks up stock prices and symbols",
             system_prompt="You are a helpful assistant that is looking up stock prices.",
-            tools=get_stock_lookup_tools(),
+            tools=get_stock_lookup_tools(market_data),
+            speculative=True,
         ),
         AgentConfig(
             name="Authentication Agent",
@@ -62,7 +108,8 @@ def get_agent_configs() -> List[AgentConfig]:
             name="Account Balance Agent",
             description="Checks account balances",
             system_prompt="You are a helpful assistant that is looking up account balances.",
-            tools=get_account_balance_tools(),
+            tools=get_account_balance_tools(accounts),
+            speculative=True,
         ),
         AgentConfig(
             name="Transfer Money Agent",
@@ -74,7 +121,7 @@ def get_agent_configs() -> List[AgentConfig]:
 
 async def main():
     llm = OpenAI(model="gpt-3.5-turbo", temperature=0.4)
-    memory = ChatMemoryBuffer.from_defaults(llm=llm)
+    memory = ChatHistory(token_limit=3000)
     initial_state = {"username": None, "session_token": None, "account_id": None, "account_balance": None}
     agent_configs = get_agent_configs()
     workflow = ConciergeAgent(timeout=None)
@@ -89,6 +136,7 @@ async def main():
 
     result = await handler
     print(f"AGENT >> {result['response']}")
+    memory.append(result["new_messages"])
 
     while True:
         user_msg = input("USER >> ")
@@ -105,9 +153,7 @@ async def main():
 
         result = await handler
         print(f"AGENT >> {result['response']}")
-
-        for msg in result["chat_history"]:
-            memory.put(msg)
+        memory.append(result["new_messages"])
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from llama_index.llms.openai import OpenAI
+
+from chat_history import ChatHistory
+from multi_agent_concierge import AgentConfig, ConciergeAgent, get_agent_configs
+from session_store import MemorySessionStore, Session, SessionStore, SQLiteSessionStore
+
+MAX_BODY_BYTES = 64 * 1024
+# Seconds a keep-alive connection may sit idle before it is closed
+KEEPALIVE_TIMEOUT = 30
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ConciergeServer:
+    """Asyncio HTTP/1.1 JSON server running one ConciergeAgent for many sessions.
+
+    POST /chat            {"session_id"?, "message"} -> {"session_id", "response"}
+    GET /sessions/<id>    state and chat history of a session
+    DELETE /sessions/<id> end a session
+    GET /stats            session and request counters
+
+    Turns of the same session run one at a time; different sessions run
+    concurrently up to max_concurrent_turns. Sessions idle for idle_timeout
+    seconds are evicted from the store.
+    """
+
+    def __init__(self, store: SessionStore, agent_configs: List[AgentConfig], llm: Any,
+                 idle_timeout: float = 30 * 60, eviction_interval: float = 60, max_concurrent_turns: int = 256,
+                 history_token_limit: int = 3000):
+        self.store = store
+        self.agent_configs = agent_configs
+        self.llm = llm
+        self.workflow = ConciergeAgent(timeout=None)
+        self.idle_timeout = idle_timeout
+        self.eviction_interval = eviction_interval
+        self.max_concurrent_turns = max_concurrent_turns
+        self.history_token_limit = history_token_limit
+        self._turns = None
+        self._session_locks: Dict[str, List] = {}
+        self.stats = {"requests": 0, "turns": 0, "errors": 0, "evicted": 0, "connections": 0}
+
+    # Sessions
+    async def _lock_session(self, session_id: str) -> asyncio.Lock:
+        entry = self._session_locks.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        await entry[0].acquire()
+        return entry[0]
+
+    def _unlock_session(self, session_id: str) -> None:
+        entry = self._session_locks[session_id]
+        entry[0].release()
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._session_locks[session_id]
+
+    async def chat(self, session_id: Optional[str], message: str) -> Dict[str, Any]:
+        session = await self.store.get(session_id) if session_id else None
+        if session_id and session is None:
+            raise HTTPError(404, f"Unknown or expired session: {session_id}")
+        session = session or Session()
+        await self._lock_session(session.id)
+        try:
+            # Re-read under the lock so a turn that finished meanwhile is not overwritten
+            session = await self.store.get(session.id) or session
+            history = ChatHistory(self.history_token_limit, session.chat_history)
+            async with self._turns:
+                result = await self.workflow.run(
+                    user_msg=message,
+                    agent_configs=self.agent_configs,
+                    llm=self.llm,
+                    chat_history=history.get(),
+                    initial_state=session.state,
+                )
+            history.append(result["new_messages"])
+            session.chat_history = history.get()
+            session.last_active = time.time()
+            await self.store.put(session)
+            self.stats["turns"] += 1
+            return {"session_id": session.id, "response": result["response"]}
+        finally:
+            self._unlock_session(session.id)
+
+    async def evict_idle_sessions(self) -> None:
+        while True:
+            await asyncio.sleep(self.eviction_interval)
+            try:
+                evicted = await self.store.evict_idle(self.idle_timeout)
+                self.stats["evicted"] += len(evicted)
+            except Exception as e:
+                print(f"Session eviction failed: {e}")
+
+    # HTTP
+    async def route(self, method: str, path: str, body: bytes) -> Dict[str, Any]:
+        parts = [part for part in path.split("?", 1)[0].split("/") if part]
+        if parts == ["chat"]:
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                raise HTTPError(400, "Body must be JSON")
+            if not isinstance(payload.get("message"), str) or not payload["message"].strip():
+                raise HTTPError(400, "'message' is required")
+            return await self.chat(payload.get("session_id"), payload["message"])
+        if len(parts) == 2 and parts[0] == "sessions":
+            if method == "GET":
+                session = await self.store.get(parts[1])
+                if session is None:
+                    raise HTTPError(404, "Unknown or expired session")
+                return {"session_id": session.id, "state": session.state, "chat_history": session.chat_history}
+            if method == "DELETE":
+                await self.store.delete(parts[1])
+                return {"deleted": parts[1]}
+            raise HTTPError(405, "Use GET or DELETE")
+        if parts == ["stats"]:
+            return {**self.stats, "sessions": await self.store.count(), "active_sessions": len(self._session_locks),
+                    "dispatch": self.workflow.metrics.as_dict()}
+        raise HTTPError(404, "Not found")
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    return
+                if not request_line:
+                    return
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    return
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                self.stats["requests"] += 1
+                length = None
+                try:
+                    try:
+                        content_length = int(headers.get("content-length", 0) or 0)
+                    except ValueError:
+                        content_length = -1
+                    if content_length < 0:
+                        raise HTTPError(400, "Invalid Content-Length")
+                    length = content_length
+                    if length > MAX_BODY_BYTES:
+                        raise HTTPError(413, "Body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, response = 200, await self.route(method, path, body)
+                except HTTPError as e:
+                    status, response = e.status, {"error": str(e)}
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    status, response = 500, {"error": str(e)}
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                # The body was not read if its length was invalid or too large
+                keep_alive = keep_alive and length is not None and length <= MAX_BODY_BYTES
+                data = json.dumps(response, default=str).encode("utf-8")
+                writer.write(
+                    f"{version} {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        """Start listening and evicting idle sessions; returns the asyncio server"""
+        self._turns = asyncio.Semaphore(self.max_concurrent_turns)
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        self._eviction = asyncio.get_running_loop().create_task(self.evict_idle_sessions())
+        return server
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Serve the concierge agent over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--store", choices=["memory", "sqlite"], default="memory", help="Where sessions are kept.")
+    parser.add_argument("--sqlite-path", default="concierge_sessions.sqlite3")
+    parser.add_argument("--max-sessions", type=int, default=10000, help="LRU limit of the memory store.")
+    parser.add_argument("--idle-timeout", type=float, default=30 * 60, help="Seconds before an idle session is evicted.")
+    parser.add_argument("--max-concurrent-turns", type=int, default=256, help="Agent turns running at once.")
+    parser.add_argument("--history-tokens", type=int, default=3000, help="Token limit of each session's chat history.")
+    args = parser.parse_args()
+
+    if args.store == "sqlite":
+        store = SQLiteSessionStore(args.sqlite_path)
+    else:
+        store = MemorySessionStore(max_sessions=args.max_sessions)
+    llm = OpenAI(model="gpt-3.5-turbo", temperature=0.4)
+    concierge = ConciergeServer(store, get_agent_configs(), llm, idle_timeout=args.idle_timeout,
+                                max_concurrent_turns=args.max_concurrent_turns, history_token_limit=args.history_tokens)
+    server = await concierge.serve(args.host, args.port)
+    print(f"Concierge listening on http://{args.host}:{args.port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
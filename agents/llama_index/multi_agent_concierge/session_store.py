@@ -0,0 +1,155 @@
+import asyncio
+import json
+import secrets
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def initial_state() -> Dict[str, Any]:
+    return {"username": None, "session_token": None, "account_id": None, "account_balance": None}
+
+
+class Session:
+    """State and chat history of one conversation"""
+
+    def __init__(self, session_id: str = None, state: Dict[str, Any] = None,
+                 chat_history: List[Dict[str, Any]] = None, last_active: float = None):
+        self.id = session_id or secrets.token_urlsafe(16)
+        self.state = state if state is not None else initial_state()
+        self.chat_history = chat_history or []
+        self.last_active = last_active or time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "state": self.state, "chat_history": self.chat_history, "last_active": self.last_active}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Session":
+        return cls(data["id"], data["state"], data["chat_history"], data["last_active"])
+
+
+class SessionStore:
+    """Where sessions live between turns; subclasses implement the storage"""
+
+    async def get(self, session_id: str) -> Optional[Session]:
+        raise NotImplementedError
+
+    async def put(self, session: Session) -> None:
+        raise NotImplementedError
+
+    async def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    async def evict_idle(self, idle_timeout: float) -> List[str]:
+        """Remove sessions inactive for idle_timeout seconds; returns their ids"""
+        raise NotImplementedError
+
+    async def count(self) -> int:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions in process memory, dropping the least recently used beyond max_sessions"""
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+    async def get(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    async def put(self, session):
+        self._sessions[session.id] = session
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def delete(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    async def evict_idle(self, idle_timeout):
+        cutoff = time.time() - idle_timeout
+        # Reads reorder the LRU without touching last_active, so check every session
+        evicted = [session_id for session_id, session in self._sessions.items() if session.last_active < cutoff]
+        for session_id in evicted:
+            del self._sessions[session_id]
+        return evicted
+
+    async def count(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions persisted in SQLite so they survive restarts and can outgrow memory.
+
+    Queries run in a worker thread so the event loop never blocks on disk.
+    """
+
+    def __init__(self, path: str = "concierge_sessions.sqlite3"):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, last_active REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS sessions_last_active ON sessions (last_active)")
+        self._connection.commit()
+        # One connection, used by one thread at a time; created inside the running loop
+        self._lock = None
+
+    async def _run(self, fn, *args):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            return await asyncio.to_thread(fn, *args)
+
+    def _get(self, session_id):
+        row = self._connection.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return Session.from_dict(json.loads(row[0])) if row else None
+
+    def _put(self, session):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO sessions (id, data, last_active) VALUES (?, ?, ?)",
+            (session.id, json.dumps(session.to_dict(), default=str), session.last_active),
+        )
+        self._connection.commit()
+
+    def _delete(self, session_id):
+        self._connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        self._connection.commit()
+
+    def _evict_idle(self, idle_timeout):
+        cutoff = time.time() - idle_timeout
+        evicted = [row[0] for row in self._connection.execute(
+            "SELECT id FROM sessions WHERE last_active < ?", (cutoff,)
+        )]
+        self._connection.execute("DELETE FROM sessions WHERE last_active < ?", (cutoff,))
+        self._connection.commit()
+        return evicted
+
+    def _count(self):
+        return self._connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    async def get(self, session_id):
+        return await self._run(self._get, session_id)
+
+    async def put(self, session):
+        await self._run(self._put, session)
+
+    async def delete(self, session_id):
+        await self._run(self._delete, session_id)
+
+    async def evict_idle(self, idle_timeout):
+        return await self._run(self._evict_idle, idle_timeout)
+
+    async def count(self):
+        return await self._run(self._count)
+
+    async def close(self):
+        await self._run(self._connection.close)
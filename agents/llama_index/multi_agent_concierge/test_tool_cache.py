@@ -0,0 +1,77 @@
+import pytest
+import asyncio
+from tool_cache import CachedLookup, FakeBackend
+
+PRICES = {"AAPL": 189.5, "MSFT": 410.2, "NVDA": 880.1}
+
+@pytest.mark.asyncio
+async def test_cached_until_ttl_expires():
+    backend = FakeBackend(PRICES, latency=0)
+    prices = CachedLookup("stock_price", backend.fetch, ttl=0.1, window=0)
+
+    assert await prices.get("AAPL") == 189.5
+    assert await prices.get("AAPL") == 189.5
+    assert len(backend.calls) == 1
+
+    await asyncio.sleep(0.15)
+    assert await prices.get("AAPL") == 189.5
+    assert len(backend.calls) == 2
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_share_one_fetch():
+    backend = FakeBackend(PRICES, latency=0.05)
+    prices = CachedLookup("stock_price", backend.fetch, window=0.01)
+
+    values = await asyncio.gather(*(prices.get("MSFT") for _ in range(50)))
+
+    assert values == [410.2] * 50
+    assert backend.calls == [["MSFT"]]
+    assert prices.stats["coalesced"] == 49
+
+@pytest.mark.asyncio
+async def test_keys_within_window_are_batched():
+    backend = FakeBackend(PRICES, latency=0)
+    prices = CachedLookup("stock_price", backend.fetch, window=0.05)
+
+    values = await asyncio.gather(prices.get("AAPL"), prices.get("MSFT"), prices.get("NVDA"))
+
+    assert values == [189.5, 410.2, 880.1]
+    assert backend.calls == [["AAPL", "MSFT", "NVDA"]]
+
+@pytest.mark.asyncio
+async def test_max_batch_flushes_without_waiting_for_window():
+    backend = FakeBackend(PRICES, latency=0)
+    prices = CachedLookup("stock_price", backend.fetch, window=10, max_batch=2)
+
+    values = await asyncio.wait_for(asyncio.gather(prices.get("AAPL"), prices.get("MSFT")), 1)
+
+    assert values == [189.5, 410.2]
+    assert backend.calls == [["AAPL", "MSFT"]]
+
+@pytest.mark.asyncio
+async def test_missing_keys_are_not_cached():
+    backend = FakeBackend(PRICES, latency=0)
+    prices = CachedLookup("stock_price", backend.fetch, window=0)
+
+    with pytest.raises(LookupError):
+        await prices.get("TSLA")
+    backend.values["TSLA"] = 175.0
+    assert await prices.get("TSLA") == 175.0
+    assert len(backend.calls) == 2
+
+@pytest.mark.asyncio
+async def test_backend_errors_are_not_cached():
+    calls = []
+
+    async def flaky_fetch(keys):
+        calls.append(list(keys))
+        if len(calls) == 1:
+            raise ConnectionError("backend down")
+        return {key: PRICES[key] for key in keys}
+
+    prices = CachedLookup("stock_price", flaky_fetch, window=0)
+
+    with pytest.raises(ConnectionError):
+        await prices.get("NVDA")
+    assert await prices.get("NVDA") == 880.1
+    assert len(calls) == 2
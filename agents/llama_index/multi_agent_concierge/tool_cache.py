@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Set
+
+
+class CachedLookup:
+    """Cached, coalesced and batched lookups against a backend that fetches many keys at once.
+
+    batch_fetch(keys) returns {key: value}; keys missing from the result raise
+    LookupError for their callers. Values are cached for ttl seconds. Concurrent
+    lookups of the same key share one fetch (single-flight), and all keys
+    requested within window seconds, up to max_batch, go to the backend in one
+    call. Must be used from a single event loop.
+    """
+
+    def __init__(self, name: str, batch_fetch: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+                 ttl: float = 5.0, window: float = 0.01, max_batch: int = 100, max_entries: int = 10000):
+        self.name = name
+        self.batch_fetch = batch_fetch
+        self.ttl = ttl
+        self.window = window
+        self.max_batch = max_batch
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._batch: List[Hashable] = []
+        self._flush_handle = None
+        # The loop only keeps weak references to tasks; hold running fetches until they finish
+        self._fetches: Set[asyncio.Task] = set()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "backend_calls": 0, "backend_keys": 0}
+
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return False, None
+        self._cache.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value):
+        self._cache[key] = (value, time.monotonic() + self.ttl)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """Forget one key, or everything, e.g. after a write to the backend"""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    async def get(self, key: Hashable) -> Any:
+        found, value = self._cached(key)
+        if found:
+            self.stats["hits"] += 1
+            return value
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        self.stats["misses"] += 1
+        loop = asyncio.get_running_loop()
+        future = self._in_flight[key] = loop.create_future()
+        self._batch.append(key)
+        if len(self._batch) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        # Shielded so a cancelled caller does not cancel the lookup for everyone else
+        return await asyncio.shield(future)
+
+    async def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        keys = list(dict.fromkeys(keys))
+        values = await asyncio.gather(*(self.get(key) for key in keys))
+        return dict(zip(keys, values))
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        keys, self._batch = self._batch, []
+        if keys:
+            task = asyncio.get_running_loop().create_task(self._fetch(keys))
+            self._fetches.add(task)
+            task.add_done_callback(self._fetches.discard)
+
+    async def _fetch(self, keys):
+        self.stats["backend_calls"] += 1
+        self.stats["backend_keys"] += len(keys)
+        try:
+            results = await self.batch_fetch(keys)
+        except Exception as e:
+            results, error = {}, e
+        else:
+            error = None
+        for key in keys:
+            future = self._in_flight.pop(key)
+            if future.done():
+                continue
+            if key in results:
+                # Errors are not cached, so the next lookup tries again
+                self._store(key, results[key])
+                future.set_result(results[key])
+            else:
+                future.set_exception(error or LookupError(f"{self.name}: no result for {key!r}"))
+                # Mark it retrieved so no warning is logged if every caller was cancelled
+                future.exception()
+
+
+class FakeBackend:
+    """In-process stand-in for a market-data or balance service, for tests and benchmarks.
+
+    fetch(keys) answers from values after latency seconds and records every call.
+    """
+
+    def __init__(self, values: Dict[Hashable, Any], latency: float = 0.05):
+        self.values = dict(values)
+        self.latency = latency
+        self.calls: List[List[Hashable]] = []
+
+    async def fetch(self, keys: List[Hashable]) -> Dict[Hashable, Any]:
+        self.calls.append(list(keys))
+        await asyncio.sleep(self.latency)
+        return {key: self.values[key] for key in keys if key in self.values}
+
+
+async def _demo(sessions: int = 1000):
+    backend = FakeBackend({"AAPL": 189.5, "MSFT": 410.2, "NVDA": 880.1, "GOOG": 152.3})
+    prices = CachedLookup("stock_price", backend.fetch, ttl=5.0)
+    symbols = ["AAPL", "MSFT", "NVDA", "GOOG"]
+    started = time.perf_counter()
+    await asyncio.gather(*(prices.get(symbols[i % len(symbols)]) for i in range(sessions)))
+    await asyncio.gather(*(prices.get(symbols[i % len(symbols)]) for i in range(sessions)))
+    elapsed = time.perf_counter() - started
+    print(f"{2 * sessions} lookups in {elapsed * 1000:.0f} ms, {len(backend.calls)} backend call(s): {prices.stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_demo())
@@ -0,0 +1,132 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+
+from llama_index import SimpleDirectoryReader, VectorStoreIndex
+from llama_index.vector_stores import PGVectorStore
+from sqlalchemy import create_engine, text
+
+logger = logging.getLogger(__name__)
+
+# Bump to re-ingest every filing, e.g. after changing the embedding model or chunking
+INGEST_VERSION = "1"
+
+REGISTRY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sec_ingestion_registry (
+    file_path TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    doc_ids TEXT NOT NULL,
+    ingested_at DOUBLE PRECISION NOT NULL
+)
+"""
+
+
+def attach_index(engine):
+    """The index over the filings already stored in Postgres; nothing is read or embedded"""
+    vector_store = PGVectorStore.from_engine(engine)
+    return VectorStoreIndex.from_vector_store(vector_store)
+
+
+def file_hash(path):
+    digest = hashlib.sha256(INGEST_VERSION.encode("utf-8"))
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan(data_dir):
+    """{path relative to data_dir: content hash} of every file under data_dir"""
+    files = {}
+    for root, dirs, names in os.walk(data_dir):
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        for name in names:
+            if name.startswith("."):
+                continue
+            path = os.path.join(root, name)
+            files[os.path.relpath(path, data_dir)] = file_hash(path)
+    return files
+
+
+def load_registry(engine):
+    with engine.begin() as connection:
+        connection.execute(text(REGISTRY_SCHEMA))
+        rows = connection.execute(text("SELECT file_path, content_hash, doc_ids FROM sec_ingestion_registry"))
+        return {row[0]: (row[1], json.loads(row[2])) for row in rows}
+
+
+def index_version(engine):
+    """Changes whenever ingestion adds, updates or removes a filing"""
+    with engine.begin() as connection:
+        connection.execute(text(REGISTRY_SCHEMA))
+        rows = connection.execute(text("SELECT file_path, content_hash FROM sec_ingestion_registry ORDER BY file_path"))
+        digest = hashlib.sha256(INGEST_VERSION.encode("utf-8"))
+        for file_path, content_hash in rows:
+            digest.update(f"{file_path}\0{content_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def ingest(engine, data_dir="data"):
+    """Bring the index in line with data_dir: embed new and changed filings, remove deleted ones.
+
+    Safe to re-run at any point: a filing is only recorded in the registry
+    after its nodes are stored, and its old and new document ids are deleted
+    before it is (re)inserted, so an interrupted run leaves no duplicates.
+    """
+    index = attach_index(engine)
+    registry = load_registry(engine)
+    current = scan(data_dir)
+    stats = {"unchanged": 0, "added": 0, "updated": 0, "removed": 0}
+
+    for rel_path, content_hash in sorted(current.items()):
+        previous = registry.get(rel_path)
+        if previous and previous[0] == content_hash:
+            stats["unchanged"] += 1
+            continue
+        started = time.perf_counter()
+        documents = SimpleDirectoryReader(
+            input_files=[os.path.join(data_dir, rel_path)], filename_as_id=True
+        ).load_data()
+        doc_ids = [document.doc_id for document in documents]
+        for doc_id in set(doc_ids) | set(previous[1] if previous else []):
+            index.delete_ref_doc(doc_id, delete_from_docstore=True)
+        for document in documents:
+            index.insert(document)
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "INSERT INTO sec_ingestion_registry (file_path, content_hash, doc_ids, ingested_at) "
+                    "VALUES (:file_path, :content_hash, :doc_ids, :ingested_at) "
+                    "ON CONFLICT (file_path) DO UPDATE SET content_hash = excluded.content_hash, "
+                    "doc_ids = excluded.doc_ids, ingested_at = excluded.ingested_at"
+                ),
+                {"file_path": rel_path, "content_hash": content_hash, "doc_ids": json.dumps(doc_ids),
+                 "ingested_at": time.time()},
+            )
+        stats["updated" if previous else "added"] += 1
+        logger.info(f"Ingested {rel_path} ({len(documents)} documents) in {time.perf_counter() - started:.1f}s")
+
+    for rel_path in sorted(set(registry) - set(current)):
+        for doc_id in registry[rel_path][1]:
+            index.delete_ref_doc(doc_id, delete_from_docstore=True)
+        with engine.begin() as connection:
+            connection.execute(text("DELETE FROM sec_ingestion_registry WHERE file_path = :file_path"),
+                               {"file_path": rel_path})
+        stats["removed"] += 1
+        logger.info(f"Removed {rel_path}")
+
+    return stats
+
+
+if __name__ == "__main__":
+    from app.core.config import settings
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Ingest SEC filings into the vector store")
+    parser.add_argument("--data-dir", default="data", help="Directory of filings to ingest.")
+    args = parser.parse_args()
+    stats = ingest(create_engine(settings.DATABASE_URL), args.data_dir)
+    logger.info(f"Ingestion finished: {stats}")
@@ -1,11 +1,16 @@
+import asyncio
+import json
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
-from llama_index import VectorStoreIndex, SimpleDirectoryReader
-from llama_index.vector_stores import PGVectorStore
-from llama_index.storage.storage_context import StorageContext
 from sqlalchemy import create_engine
 from app.core.config import settings
+from ingest import attach_index, index_version
+from semantic_cache import SemanticCache
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -25,20 +30,92 @@ app.add_middleware(
 
 # Initialize database connection
 engine = create_engine(settings.DATABASE_URL)
-vector_store = PGVectorStore.from_engine(engine)
 
-# Load documents
-documents = SimpleDirectoryReader('data').load_data()
+# Attach to the existing index; filings are embedded separately with `python ingest.py`
+index = attach_index(engine)
 
-# Create index
-storage_context = StorageContext.from_defaults(vector_store=vector_store)
-index = VectorStoreIndex.from_documents(documents, storage_context=storage_context)
+# Query engines are built once and shared by all requests
+query_engine = index.as_query_engine()
+streaming_query_engine = index.as_query_engine(streaming=True)
+
+# Retrieval and generation block, so they run in a sized thread pool instead of on the event loop
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", "8"))
+query_executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="query")
+
+# Answers to earlier queries, reused for near-identical ones and dropped when ingestion changes the filings
+response_cache = SemanticCache(
+    index.service_context.embed_model.get_query_embedding,
+    threshold=float(os.getenv("CACHE_SIMILARITY", "0.92")),
+    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1000")),
+    ttl=float(os.getenv("CACHE_TTL", "3600")),
+    version_fn=lambda: index_version(engine),
+)
+
+def cached_query(query):
+    cached, embedding, version = response_cache.lookup(query)
+    if cached is not None:
+        return cached, True
+    response = str(query_engine.query(query))
+    response_cache.store(query, response, embedding, version)
+    return response, False
 
 @app.post("/query")
 async def query_documents(query: str):
-    query_engine = index.as_query_engine()
-    response = query_engine.query(query)
-    return {"response": str(response)}
+    loop = asyncio.get_running_loop()
+    response, cached = await loop.run_in_executor(query_executor, cached_query, query)
+    return {"response": response, "cached": cached}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return response_cache.stats()
+
+def sse(data, event=None):
+    return (f"event: {event}\n" if event else "") + f"data: {json.dumps(data)}\n\n"
+
+@app.post("/query/stream")
+async def stream_query_documents(query: str):
+    """Server-sent events: one "token" event per generated token, then "done" (or "error")"""
+    loop = asyncio.get_running_loop()
+    tokens = asyncio.Queue()
+    stop = threading.Event()
+
+    def generate():
+        # Runs in the executor; hands tokens to the event loop as they arrive
+        try:
+            cached, embedding, version = response_cache.lookup(query)
+            if cached is not None:
+                loop.call_soon_threadsafe(tokens.put_nowait, ("token", cached))
+                loop.call_soon_threadsafe(tokens.put_nowait, ("done", None))
+                return
+            response = streaming_query_engine.query(query)
+            generated = []
+            for token in response.response_gen:
+                if stop.is_set():
+                    return
+                generated.append(token)
+                loop.call_soon_threadsafe(tokens.put_nowait, ("token", token))
+            response_cache.store(query, "".join(generated), embedding, version)
+            loop.call_soon_threadsafe(tokens.put_nowait, ("done", None))
+        except Exception as e:
+            logger.exception("Streaming query failed")
+            loop.call_soon_threadsafe(tokens.put_nowait, ("error", str(e)))
+
+    async def events():
+        worker = loop.run_in_executor(query_executor, generate)
+        try:
+            while True:
+                kind, value = await tokens.get()
+                if kind == "token":
+                    yield sse({"token": value}, "token")
+                    continue
+                yield sse({} if kind == "done" else {"error": value}, kind)
+                break
+            await worker
+        finally:
+            # Client went away: stop generating for it
+            stop.set()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,117 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SemanticCache:
+    """Answers keyed by query embedding, reused for queries that mean the same thing.
+
+    A lookup returns the stored answer of the most similar cached query if its
+    cosine similarity is at least threshold. Entries expire after ttl seconds,
+    the least recently used are evicted beyond max_entries, and everything is
+    dropped when version_fn() (checked at most every version_check_interval
+    seconds) reports that the indexed documents changed. Thread-safe.
+    """
+
+    def __init__(self, embed_fn, threshold=0.92, max_entries=1000, ttl=3600, version_fn=None,
+                 version_check_interval=30):
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_fn = version_fn
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()  # id -> (query, unit embedding, response, created_at)
+        self._ids = itertools.count()
+        self._matrix = None
+        self._matrix_ids = []
+        self._version = version_fn() if version_fn else None
+        self._version_checked = time.monotonic()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        if self.version_fn is None:
+            return
+        # Only the thread that claims the check runs version_fn; the others keep using the current version
+        with self._lock:
+            if time.monotonic() - self._version_checked < self.version_check_interval:
+                return
+            self._version_checked = time.monotonic()
+        version = self.version_fn()
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._entries.clear()
+                self._matrix = None
+                self.invalidations += 1
+
+    def embed(self, query):
+        embedding = np.asarray(self.embed_fn(query), dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def lookup(self, query):
+        """(cached response or None, query embedding, version); pass both to store() on a miss"""
+        self._check_version()
+        embedding = self.embed(query)
+        with self._lock:
+            self._expire()
+            if self._entries:
+                if self._matrix is None:
+                    self._matrix_ids = list(self._entries)
+                    self._matrix = np.stack([self._entries[entry_id][1] for entry_id in self._matrix_ids])
+                similarities = self._matrix @ embedding
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id = self._matrix_ids[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return self._entries[entry_id][2], embedding, self._version
+            self.misses += 1
+            return None, embedding, self._version
+
+    def store(self, query, response, embedding=None, version=None):
+        """Cache response; dropped if the documents changed since the lookup that returned version"""
+        if embedding is None:
+            embedding = self.embed(query)
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._entries[next(self._ids)] = (query, embedding, response, time.monotonic())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry[3] < cutoff]
+        for entry_id in expired:
+            del self._entries[entry_id]
+        if expired:
+            self.evictions += len(expired)
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }